@@ -0,0 +1,161 @@
+"""
+Local disk cache for pipeline artifacts (images, effect videos, audio, final videos).
+
+Artifacts are keyed by a hash of their upstream URL and kept under a byte
+budget; when the budget is exceeded the least recently used files are evicted.
+Downloads are streamed straight to disk so large videos never sit in memory.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlparse
+
+from clients import http
+from pipeline_log import get_logger
+
+log = get_logger(__name__)
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class ArtifactCache:
+    def __init__(self, cache_dir, max_bytes, download_workers=2):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # key -> size in bytes, least recently used first
+        self._urls = {}  # key -> upstream URL, for read-through on a miss
+        self._in_flight = {}  # key -> Event set once the download finishes
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=download_workers)
+        self._load_existing()
+
+    def _load_existing(self):
+        """
+        Index files left over from a previous run, oldest access first, and
+        delete partial downloads that run was killed in the middle of
+        """
+        files = []
+        for path in self.cache_dir.iterdir():
+            if not path.is_file():
+                continue
+            if path.name.startswith('.download-'):
+                path.unlink(missing_ok=True)
+            elif not path.name.startswith('.'):
+                files.append(path)
+        for path in sorted(files, key=lambda p: p.stat().st_atime):
+            size = path.stat().st_size
+            self._entries[path.name] = size
+            self.total_bytes += size
+        self._evict()
+
+    @staticmethod
+    def key_for(url):
+        """Stable cache key for an upstream URL, keeping its file extension"""
+        suffix = Path(urlparse(url).path).suffix.lower()[:8]
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()[:32] + suffix
+
+    def register(self, url):
+        """Remember an upstream URL so it can be fetched on demand; returns its key"""
+        key = self.key_for(url)
+        with self._lock:
+            self._urls[key] = url
+        return key
+
+    def mirror_async(self, url):
+        """Register a URL and download it in the background; returns its key"""
+        key = self.register(url)
+        self._executor.submit(self.mirror, url)
+        return key
+
+    def mirror(self, url):
+        """
+        Download an artifact into the cache unless it is already there
+        """
+        key = self.register(url)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return key
+            event = self._in_flight.get(key)
+            owner = event is None
+            if owner:
+                event = self._in_flight[key] = threading.Event()
+
+        if not owner:
+            # Another thread is already downloading this artifact
+            event.wait()
+            return key if key in self._entries else None
+
+        try:
+            size = self._download(url, self.cache_dir / key)
+            with self._lock:
+                self._entries[key] = size
+                self.total_bytes += size
+                self._evict()
+            return key
+        except Exception as e:
+            log.error("Error caching artifact %s: %s", url, e)
+            with self._lock:
+                self._urls.pop(key, None)
+            return None
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            event.set()
+
+    def _download(self, url, path):
+        """Stream a URL to a temp file in the cache dir, then atomically move it into place"""
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.download-')
+        try:
+            with os.fdopen(fd, 'wb') as f, http().get(url, stream=True, timeout=60) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+            os.replace(temp_path, path)
+            return path.stat().st_size
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def _evict(self):
+        """Drop least recently used files until the cache fits its byte budget (lock held)"""
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            # Forget the URL too, so the map doesn't grow with every job ever served
+            self._urls.pop(key, None)
+            try:
+                os.unlink(self.cache_dir / key)
+            except FileNotFoundError:
+                pass
+
+    def get_path(self, key):
+        """
+        Return the local path for a cached artifact, fetching it from upstream
+        on a miss if its URL is known. Returns None if it can't be served.
+        The file may still be evicted before the caller opens it.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self.cache_dir / key
+            url = self._urls.get(key)
+
+        if url is None or self.mirror(url) is None:
+            return None
+        return self.cache_dir / key
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'total_bytes': self.total_bytes,
+                'max_bytes': self.max_bytes
+            }
@@ -0,0 +1,120 @@
+"""
+Audio post-processing between text-to-speech and lipsync.
+
+ElevenLabs MP3s carry leading/trailing silence and a higher bitrate than the
+lipsync model needs, and lipsync render time grows with audio duration. This
+stage trims the silence, normalizes loudness, downmixes to mono and re-encodes
+at a lower bitrate with ffmpeg. The work runs in a process pool so request and
+worker threads only wait on the result.
+
+Environment:
+    AUDIO_POSTPROCESS      set to 0 to skip this stage (default on when ffmpeg is installed)
+    AUDIO_BITRATE          output MP3 bitrate (default 64k)
+    AUDIO_SILENCE_DB       level below which audio counts as silence (default -45dB)
+    AUDIO_POST_WORKERS     process pool size (default 2)
+"""
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from pipeline_log import get_logger
+
+log = get_logger(__name__)
+
+AUDIO_POSTPROCESS = os.getenv('AUDIO_POSTPROCESS', '1').lower() not in ('0', 'false', 'no')
+AUDIO_BITRATE = os.getenv('AUDIO_BITRATE', '64k')
+AUDIO_SILENCE_DB = os.getenv('AUDIO_SILENCE_DB', '-45dB')
+AUDIO_POST_WORKERS = int(os.getenv('AUDIO_POST_WORKERS', 2))
+
+FFMPEG_TIMEOUT = 60
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=AUDIO_POST_WORKERS)
+        return _pool
+
+
+def _timeout(ends_at):
+    """
+    Seconds a child process may run: FFMPEG_TIMEOUT, or less when ends_at (a
+    time.time() value) comes first. subprocess.run kills the child when it expires.
+    """
+    if ends_at is None:
+        return FFMPEG_TIMEOUT
+    timeout = min(FFMPEG_TIMEOUT, ends_at - time.time())
+    if timeout <= 0:
+        raise subprocess.TimeoutExpired('ffmpeg', 0)
+    return timeout
+
+
+def probe_duration(audio_bytes, ends_at=None):
+    """Duration in seconds of an encoded audio clip, via ffprobe"""
+    completed = subprocess.run(
+        ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+         '-of', 'default=noprint_wrappers=1:nokey=1', '-i', 'pipe:0'],
+        input=audio_bytes, capture_output=True, check=True, timeout=_timeout(ends_at)
+    )
+    return float(completed.stdout.strip() or 0)
+
+
+def compact_audio(audio_bytes, bitrate=AUDIO_BITRATE, silence_db=AUDIO_SILENCE_DB, ends_at=None):
+    """
+    Trim leading/trailing silence, normalize loudness, downmix to mono and
+    re-encode to MP3 at the given bitrate. Returns (audio bytes, stats dict).
+    Runs in the worker process, so everything it needs is passed in; every
+    child process is killed at ends_at so an abandoned run frees its slot.
+    """
+    trim = f"silenceremove=start_periods=1:start_threshold={silence_db}:start_silence=0.05"
+    # silenceremove only trims the start, so reverse the clip to trim its tail too
+    audio_filter = f"{trim},areverse,{trim},areverse,loudnorm=I=-16:TP=-1.5:LRA=11"
+    completed = subprocess.run(
+        ['ffmpeg', '-v', 'error', '-i', 'pipe:0', '-af', audio_filter,
+         '-ac', '1', '-c:a', 'libmp3lame', '-b:a', bitrate, '-f', 'mp3', 'pipe:1'],
+        input=audio_bytes, capture_output=True, check=True, timeout=_timeout(ends_at)
+    )
+    processed = completed.stdout
+
+    original_seconds = probe_duration(audio_bytes, ends_at)
+    processed_seconds = probe_duration(processed, ends_at)
+    stats = {
+        'original_seconds': round(original_seconds, 3),
+        'processed_seconds': round(processed_seconds, 3),
+        'seconds_saved': round(max(original_seconds - processed_seconds, 0.0), 3),
+        'original_bytes': len(audio_bytes),
+        'processed_bytes': len(processed)
+    }
+    return processed, stats
+
+
+def postprocess_audio(audio_bytes, timeout=None):
+    """
+    Compact TTS audio in the process pool. Falls back to the original audio
+    (with stats of None) if the stage is disabled, ffmpeg is missing or it fails,
+    since a shorter clip is an optimization and never a requirement.
+    """
+    if not AUDIO_POSTPROCESS:
+        return audio_bytes, None
+    if not shutil.which('ffmpeg') or not shutil.which('ffprobe'):
+        log.warning("ffmpeg/ffprobe not found; skipping audio post-processing")
+        return audio_bytes, None
+
+    ends_at = time.time() + timeout if timeout is not None else None
+    try:
+        processed, stats = _get_pool().submit(compact_audio, audio_bytes, ends_at=ends_at).result(timeout=timeout)
+    except Exception as e:
+        log.warning("Audio post-processing failed, using original audio: %s", e)
+        return audio_bytes, None
+
+    log.info("Audio compacted: %.2fs -> %.2fs, %s -> %s bytes",
+             stats['original_seconds'], stats['processed_seconds'],
+             stats['original_bytes'], stats['processed_bytes'])
+    return processed, stats
@@ -0,0 +1,178 @@
+"""
+Batch-process a manifest of images through the pipeline.
+
+The manifest is a CSV (with a header row) or JSONL file with one job per row:
+
+    image           local path or URL of the source image (required)
+    effects_prompt  video effects prompt
+    message         text to turn into speech
+    voice_id        ElevenLabs voice id
+    row_id          optional stable id; defaults to the row number
+
+Rows are read lazily so very large manifests never sit in memory, and at most
+--concurrency rows are in flight at any time. Every finished row is appended
+to the results JSONL and flushed immediately, so --resume can skip rows that
+already completed in a previous run.
+
+Usage:
+    python batch_process.py manifest.csv --results batch_results.jsonl
+    python batch_process.py manifest.jsonl --concurrency 8 --resume
+"""
+import argparse
+import csv
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from image_processing_generated import process_image
+from pipeline_log import get_logger
+
+log = get_logger(__name__)
+
+
+def parse_jsonl_row(line):
+    """A JSONL manifest row as a dict, or None if the line is malformed"""
+    try:
+        row = json.loads(line)
+    except ValueError:
+        return None
+    return row if isinstance(row, dict) else None
+
+
+def iter_manifest(manifest_path):
+    """
+    Yield (row_id, row) pairs from a CSV or JSONL manifest, one at a time.
+    row is None for a malformed JSONL line, so one bad line fails only its row.
+    """
+    is_jsonl = manifest_path.endswith(('.jsonl', '.ndjson'))
+    with open(manifest_path, newline='') as f:
+        if is_jsonl:
+            rows = (parse_jsonl_row(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        for index, row in enumerate(rows, start=1):
+            row_id = str((row or {}).get('row_id') or index)
+            yield row_id, row
+
+
+def load_completed_rows(results_path):
+    """
+    Return the set of row ids already marked completed in a results JSONL
+    """
+    completed = set()
+    if not os.path.exists(results_path):
+        return completed
+
+    with open(results_path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A partially written last line from an interrupted run
+                continue
+            if entry.get('status') == 'completed':
+                completed.add(str(entry['row_id']))
+    return completed
+
+
+def process_row(row_id, row):
+    """
+    Run a single manifest row through process_image and build its result entry
+    """
+    image = row.get('image')
+    if not image:
+        return {'row_id': row_id, 'status': 'failed', 'error': 'Row has no image'}
+
+    result = process_image(
+        image,
+        effects_prompt=row.get('effects_prompt') or None,
+        audio_prompt=row.get('message') or None,
+        voice_id=row.get('voice_id') or None
+    )
+    entry = result.to_dict()
+    entry['row_id'] = row_id
+    entry['image'] = image
+    return entry
+
+
+def terminate_partial_line(results_path, out):
+    """
+    Finish a partially written last line from an interrupted run, so the next
+    entry appended to the results file starts on its own line
+    """
+    if os.path.getsize(results_path) == 0:
+        return
+    with open(results_path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b'\n':
+            out.write('\n')
+            out.flush()
+
+
+def run_batch(manifest_path, results_path, concurrency=4, resume=False):
+    """
+    Process every manifest row with bounded concurrency, appending results as they finish
+    """
+    completed = load_completed_rows(results_path) if resume else set()
+    if completed:
+        log.info("Resuming: skipping %s completed rows", len(completed))
+
+    counts = {'completed': 0, 'failed': 0, 'skipped': 0}
+
+    def record(future, row_id, out):
+        try:
+            entry = future.result()
+        except Exception as e:
+            entry = {'row_id': row_id, 'status': 'failed', 'error': str(e)}
+        out.write(json.dumps(entry) + '\n')
+        out.flush()
+        counts['completed' if entry.get('status') == 'completed' else 'failed'] += 1
+
+    mode = 'a' if resume else 'w'
+    with open(results_path, mode) as out, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        if resume:
+            terminate_partial_line(results_path, out)
+
+        pending = {}
+        for row_id, row in iter_manifest(manifest_path):
+            if row_id in completed:
+                counts['skipped'] += 1
+                continue
+
+            if row is None:
+                log.warning("Manifest row %s is malformed; recording it as failed", row_id)
+                out.write(json.dumps({'row_id': row_id, 'status': 'failed',
+                                      'error': 'Malformed manifest row'}) + '\n')
+                out.flush()
+                counts['failed'] += 1
+                continue
+
+            # Keep the number of in-flight rows bounded so the manifest is consumed lazily
+            if len(pending) >= concurrency:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record(future, pending.pop(future), out)
+
+            pending[executor.submit(process_row, row_id, row)] = row_id
+
+        done, _ = wait(pending)
+        for future in done:
+            record(future, pending[future], out)
+
+    log.info("Batch finished: %s completed, %s failed, %s skipped",
+             counts['completed'], counts['failed'], counts['skipped'])
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Process a CSV/JSONL manifest of images through the pipeline')
+    parser.add_argument('manifest', help='CSV or JSONL manifest file')
+    parser.add_argument('--results', default='batch_results.jsonl',
+                        help='Results JSONL file (default: batch_results.jsonl)')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='Maximum number of rows processed at once (default: 4)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip rows already completed in the results file')
+    args = parser.parse_args()
+
+    run_batch(args.manifest, args.results, concurrency=args.concurrency, resume=args.resume)
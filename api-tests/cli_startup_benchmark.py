@@ -0,0 +1,126 @@
+"""
+Cold start benchmark for vibe-veed.py.
+
+Runs each case in fresh interpreters (so nothing is cached in-process) and
+compares the fastest run with the fastest bare `python -c pass`:
+
+    - the CLI's --help and each subcommand's --help (argument parsing only)
+    - importing the modules each subcommand loads before it calls upstream
+
+It also checks that importing those modules loads none of the upstream
+clients (cloudinary, fal_client, requests, httpx, dotenv), which is the
+regression that makes cold start slow. Exits non-zero if a client is loaded
+eagerly or a case's overhead exceeds its budget, so it can guard CI.
+
+Usage:
+    python cli_startup_benchmark.py
+    python cli_startup_benchmark.py --runs 20 --budget-ms 50 --import-budget-ms 150
+    python cli_startup_benchmark.py --importtime     # show the slowest imports of `--help`
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CLI_PATH = os.path.join(SCRIPT_DIR, 'vibe-veed.py')
+
+COMMANDS = [
+    ['--help'],
+    ['upload', '--help'],
+    ['remove-bg', '--help'],
+    ['tts', '--help'],
+    ['lipsync', '--help'],
+    ['run', '--help'],
+]
+
+# What each subcommand imports before it makes its first upstream call
+SUBCOMMAND_MODULES = {
+    'upload': ['cloudinary_upload'],
+    'remove-bg': ['video_pipeline'],
+    'tts': ['video_pipeline'],
+    'lipsync': ['video_pipeline'],
+    'run': ['image_processing_generated', 'job_control', 'pipeline_log', 'video_pipeline'],
+}
+
+UPSTREAM_MODULES = ('cloudinary', 'fal_client', 'requests', 'httpx', 'dotenv')
+
+
+def import_argv(modules):
+    """A python command that imports modules from this directory and prints any upstream client it loaded"""
+    code = (f"import sys; sys.path.insert(0, {SCRIPT_DIR!r}); import {', '.join(modules)}; "
+            f"print(','.join(m for m in {UPSTREAM_MODULES!r} if m in sys.modules))")
+    return [sys.executable, '-c', code]
+
+
+def time_command(argv, runs):
+    """Minimum wall time in milliseconds of running argv in a fresh process"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        timings.append((time.perf_counter() - started) * 1000)
+    # The minimum is the least noisy estimate of the work itself
+    return min(timings)
+
+
+def eager_upstream_imports(modules):
+    """Upstream client modules loaded just by importing modules"""
+    completed = subprocess.run(import_argv(modules), capture_output=True, text=True, check=True)
+    lines = completed.stdout.strip().splitlines()
+    return [m for m in lines[-1].split(',') if m] if lines else []
+
+
+def slowest_imports(argv, limit=15):
+    """Cumulative import times (microseconds) reported by python -X importtime"""
+    completed = subprocess.run([sys.executable, '-X', 'importtime'] + argv,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        # "import time:  self [us] | cumulative | imported package"
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Measure vibe-veed CLI cold start time')
+    parser.add_argument('--runs', type=int, default=10, help='Runs per case (default: 10)')
+    parser.add_argument('--budget-ms', type=float, default=50,
+                        help='Allowed overhead of --help over a bare interpreter (default: 50)')
+    parser.add_argument('--import-budget-ms', type=float, default=150,
+                        help="Allowed overhead of importing a subcommand's modules (default: 150)")
+    parser.add_argument('--importtime', action='store_true', help='List the slowest imports of `vibe-veed --help`')
+    args = parser.parse_args()
+
+    if args.importtime:
+        for cumulative_us, name in slowest_imports([CLI_PATH, '--help']):
+            print(f"{cumulative_us / 1000:8.1f} ms  {name}")
+        sys.exit(0)
+
+    baseline = time_command([sys.executable, '-c', 'pass'], args.runs)
+    print(f"{'python -c pass':<32} min {baseline:6.1f} ms")
+
+    problems = []
+    cases = [('vibe-veed ' + ' '.join(command), [sys.executable, CLI_PATH] + command, args.budget_ms)
+             for command in COMMANDS]
+    cases += [(f"import for {name}", import_argv(modules), args.import_budget_ms)
+              for name, modules in SUBCOMMAND_MODULES.items()]
+    for label, argv, budget in cases:
+        fastest = time_command(argv, args.runs)
+        overhead = fastest - baseline
+        print(f"{label:<32} min {fastest:6.1f} ms  overhead {overhead:6.1f} ms  (budget {budget:.0f} ms)")
+        if overhead > budget:
+            problems.append(f"{label} is over its {budget:.0f} ms budget")
+
+    for name, modules in SUBCOMMAND_MODULES.items():
+        eager = eager_upstream_imports(modules)
+        if eager:
+            problems.append(f"importing modules for {name} loads {', '.join(eager)}")
+
+    if problems:
+        print('\n'.join(problems), file=sys.stderr)
+        sys.exit(1)
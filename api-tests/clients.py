@@ -0,0 +1,59 @@
+"""
+Upstream clients, loaded on first use.
+
+Importing cloudinary, fal_client and requests and reading .env costs far more
+than the rest of a CLI invocation, so scripts and pipeline modules get them
+through these accessors instead of importing and configuring them at import
+time. Each accessor loads .env first and does its setup once per process.
+
+    cloudinary_uploader().upload(path, folder="uploaded_images")
+    fal().submit(application, arguments=arguments)
+    http().post(url, json=data)
+"""
+import os
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def load_env():
+    """Load .env into the environment (once)"""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+@lru_cache(maxsize=None)
+def cloudinary_uploader():
+    """cloudinary.uploader, configured from CLOUDINARY_* variables"""
+    load_env()
+    import cloudinary
+    import cloudinary.uploader
+
+    cloudinary.config(
+        cloud_name=os.getenv('CLOUDINARY_CLOUD_NAME'),
+        api_key=os.getenv('CLOUDINARY_API_KEY'),
+        api_secret=os.getenv('CLOUDINARY_API_SECRET')
+    )
+    return cloudinary.uploader
+
+
+@lru_cache(maxsize=None)
+def fal():
+    """The fal_client module (reads FAL_KEY from the environment itself)"""
+    load_env()
+    import fal_client
+    return fal_client
+
+
+@lru_cache(maxsize=None)
+def http():
+    """The requests module"""
+    load_env()
+    import requests
+    return requests
+
+
+def elevenlabs_settings():
+    """(API key, default voice id) for ElevenLabs"""
+    load_env()
+    return (os.getenv('ELEVENLABS_API_KEY'),
+            os.getenv('ELEVENLABS_VOICE_ID', 'default_voice_id'))  # You'll need to set this
@@ -1,18 +1,8 @@
-import cloudinary
-import cloudinary.uploader
-import os
 from pathlib import Path
-from dotenv import load_dotenv
+from clients import cloudinary_uploader
+from pipeline_log import get_logger
 
-# Load environment variables from .env file
-load_dotenv()
-
-# Configure Cloudinary
-cloudinary.config(
-    cloud_name=os.getenv('CLOUDINARY_CLOUD_NAME'),
-    api_key=os.getenv('CLOUDINARY_API_KEY'),
-    api_secret=os.getenv('CLOUDINARY_API_SECRET')
-)
+log = get_logger(__name__)
 
 
 def upload_image_to_cloudinary(file_path, public_id=None, folder=None):
@@ -37,16 +27,16 @@ def upload_image_to_cloudinary(file_path, public_id=None, folder=None):
             upload_options['folder'] = folder
 
         # Upload the image
-        result = cloudinary.uploader.upload(file_path, **upload_options)
+        result = cloudinary_uploader().upload(file_path, **upload_options)
 
-        print(f"Upload successful!")
-        print(f"URL: {result['secure_url']}")
-        print(f"Public ID: {result['public_id']}")
+        log.info("Upload successful!")
+        log.info("URL: %s", result['secure_url'])
+        log.info("Public ID: %s", result['public_id'])
 
         return result
 
     except Exception as e:
-        print(f"Error uploading image: {str(e)}")
+        log.error("Error uploading image: %s", e)
         return None
 
 
@@ -64,7 +54,7 @@ def upload_all_images_in_folder(folder_path="api-tests/assets"):
     folder = Path(folder_path)
 
     if not folder.exists():
-        print(f"Folder {folder_path} does not exist")
+        log.warning("Folder %s does not exist", folder_path)
         return
 
     uploaded_files = []
@@ -72,7 +62,7 @@ def upload_all_images_in_folder(folder_path="api-tests/assets"):
     for file_path in folder.iterdir():
         if file_path.is_file() and file_path.suffix.lower(
         ) in image_extensions:
-            print(f"Uploading {file_path.name}...")
+            log.info("Uploading %s...", file_path.name)
 
             # Use filename without extension as public_id
             public_id = file_path.stem
@@ -84,7 +74,7 @@ def upload_all_images_in_folder(folder_path="api-tests/assets"):
             if result:
                 uploaded_files.append(result)
 
-    print(f"\nTotal files uploaded: {len(uploaded_files)}")
+    log.info("Total files uploaded: %s", len(uploaded_files))
     return uploaded_files
 
 
@@ -1,38 +1,43 @@
 import os
-import requests
 import argparse
 import time
 import pathlib
-from dotenv import load_dotenv
 
 # Get the directory containing this script
 script_dir = pathlib.Path(__file__).parent.absolute()
 
-# Load environment variables from .env file in the same directory as the script
-dotenv_path = os.path.join(script_dir, '.env')
-load_dotenv(dotenv_path=dotenv_path)
+DEFAULT_TEXT = "Hello, this is a test of the Eleven Labs text to speech API."
+DEFAULT_VOICE_ID = "JBFqnCBsd6RMkjVDRZzb"
+DEFAULT_MODEL_ID = "eleven_flash_v2_5"
 
-# Set up command line arguments
-parser = argparse.ArgumentParser(description='Convert text to speech using Eleven Labs API')
-parser.add_argument('--api-key', help='Eleven Labs API Key')
-parser.add_argument('--text', default="Hello, this is a test of the Eleven Labs text to speech API.", 
-                    help='Text to convert to speech')
-parser.add_argument('--voice-id', default="JBFqnCBsd6RMkjVDRZzb", 
-                    help='Voice ID (default: Rachel)')
-parser.add_argument('--model-id', default="eleven_flash_v2_5", 
-                    help='Model ID (default: eleven_flash_v2_5 - faster than multilingual)')
-parser.add_argument('--output', default="elevenlabs_output.mp3", 
-                    help='Output filename')
-args = parser.parse_args()
+def parse_args(argv=None):
+    """Command line arguments; argv defaults to sys.argv"""
+    parser = argparse.ArgumentParser(description='Convert text to speech using Eleven Labs API')
+    parser.add_argument('--api-key', help='Eleven Labs API Key')
+    parser.add_argument('--text', default=DEFAULT_TEXT, 
+                        help='Text to convert to speech')
+    parser.add_argument('--voice-id', default=DEFAULT_VOICE_ID, 
+                        help='Voice ID (default: Rachel)')
+    parser.add_argument('--model-id', default=DEFAULT_MODEL_ID, 
+                        help='Model ID (default: eleven_flash_v2_5 - faster than multilingual)')
+    parser.add_argument('--output', default="elevenlabs_output.mp3", 
+                        help='Output filename')
+    return parser.parse_args(argv)
 
-# Get API key from command line argument or environment variable
-api_key = args.api_key or os.environ.get('ELEVENLABS_API_KEY')
-
-# Get current working directory for output path
-current_dir = os.getcwd()
+def load_api_key(api_key=None):
+    """API key from the argument, or ELEVENLABS_API_KEY (including the .env next to this script)"""
+    if api_key:
+        return api_key
+    from dotenv import load_dotenv
+    load_dotenv(dotenv_path=os.path.join(script_dir, '.env'))
+    return os.environ.get('ELEVENLABS_API_KEY')
 
-def text_to_speech():
+def text_to_speech(text=DEFAULT_TEXT, voice_id=DEFAULT_VOICE_ID, model_id=DEFAULT_MODEL_ID,
+                   output_file="elevenlabs_output.mp3", api_key=None):
     """Simple function to convert text to speech using Eleven Labs API"""
+    import requests
+
+    api_key = load_api_key(api_key)
     if not api_key:
         print("Error: No API key provided.")
         print("Please provide your API key using one of these methods:")
@@ -41,14 +46,8 @@ def text_to_speech():
         print("3. .env file: Create a .env file with ELEVENLABS_API_KEY=YOUR_API_KEY")
         return False
     
-    # Get parameters from command line arguments
-    text = args.text
-    voice_id = args.voice_id
-    model_id = args.model_id
-    output_file = args.output
-    
-    # Full path to output file
-    output_path = os.path.join(current_dir, output_file)
+    # Full path to output file, relative to the current working directory
+    output_path = os.path.join(os.getcwd(), output_file)
     
     # Debug API key information
     if api_key:
@@ -112,4 +111,5 @@ def text_to_speech():
         return False
 
 if __name__ == "__main__":
-    text_to_speech()
\ No newline at end of file
+    args = parse_args()
+    text_to_speech(args.text, args.voice_id, args.model_id, args.output, api_key=args.api_key)
\ No newline at end of file
@@ -1,26 +1,19 @@
-import cloudinary
-import cloudinary.uploader
 import os
 from pathlib import Path
-from dotenv import load_dotenv
-import fal_client
 import time
 import json
+import uuid
 from datetime import datetime
+from urllib.parse import urlparse
+from clients import cloudinary_uploader, fal
+from pipeline_log import get_logger, start_job, set_stage, fal_log_callback
 
-# Load environment variables
-load_dotenv()
-
-# Configure Cloudinary
-cloudinary.config(
-    cloud_name=os.getenv('CLOUDINARY_CLOUD_NAME'),
-    api_key=os.getenv('CLOUDINARY_API_KEY'),
-    api_secret=os.getenv('CLOUDINARY_API_SECRET')
-)
+log = get_logger(__name__)
 
 class ProcessingResult:
-    def __init__(self, image_name):
+    def __init__(self, image_name, job_id=None):
         self.image_name = image_name
+        self.job_id = job_id
         self.timestamp = datetime.now().isoformat()
         self.cloudinary_url = None
         self.background_removed_url = None
@@ -29,10 +22,30 @@ class ProcessingResult:
         self.final_video_url = None
         self.status = "pending"
         self.error = None
+        self.cancelled_stage = None
+        self.cancel_reason = None
+        self.elapsed_seconds = None
+        self.audio_seconds_saved = None
+        self.renditions = None
+        self.routing = None
+        self.stage_seconds = {}
+        # Kept out of to_dict: traces are only served behind the debug token
+        self.trace = None
+        self._stage = None
+        self._stage_started = None
+
+    def start_stage(self, stage):
+        """Stop timing the current stage and start timing the next one (None just stops)"""
+        now = time.monotonic()
+        if self._stage is not None:
+            self.stage_seconds[self._stage] = round(now - self._stage_started, 3)
+        self._stage = stage
+        self._stage_started = now
 
     def to_dict(self):
         return {
             "image_name": self.image_name,
+            "job_id": self.job_id,
             "timestamp": self.timestamp,
             "cloudinary_url": self.cloudinary_url,
             "background_removed_url": self.background_removed_url,
@@ -40,13 +53,21 @@ class ProcessingResult:
             "audio_url": self.audio_url,
             "final_video_url": self.final_video_url,
             "status": self.status,
-            "error": self.error
+            "error": self.error,
+            "cancelled_stage": self.cancelled_stage,
+            "cancel_reason": self.cancel_reason,
+            "elapsed_seconds": self.elapsed_seconds,
+            "audio_seconds_saved": self.audio_seconds_saved,
+            "renditions": self.renditions,
+            "routing": self.routing,
+            "stage_seconds": self.stage_seconds
         }
 
 def save_processing_result(result, output_dir="processing_results"):
     """Save processing result to a JSON file"""
     os.makedirs(output_dir, exist_ok=True)
-    filename = f"{result.image_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    # The job id keeps same-named images finishing in the same second apart
+    filename = f"{result.image_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{result.job_id or uuid.uuid4().hex[:12]}.json"
     filepath = os.path.join(output_dir, filename)
     
     with open(filepath, 'w') as f:
@@ -59,43 +80,39 @@ def upload_to_cloudinary(file_path):
     Upload an image to Cloudinary and return the secure URL
     """
     try:
-        result = cloudinary.uploader.upload(
+        result = cloudinary_uploader().upload(
             file_path,
             folder="uploaded_images"
         )
-        print(f"Upload successful! URL: {result['secure_url']}")
+        log.info("Upload successful! URL: %s", result['secure_url'])
         return result['secure_url']
     except Exception as e:
-        print(f"Error uploading to Cloudinary: {str(e)}")
+        log.error("Error uploading to Cloudinary: %s", e)
         return None
 
 def remove_background(image_url):
     """
     Remove background from image using fal.ai
     """
-    def on_queue_update(update):
-        if isinstance(update, fal_client.InProgress):
-            for log in update.logs:
-                print(log["message"])
 
     try:
-        print(f"Calling fal.ai API with image URL: {image_url}")
-        result = fal_client.subscribe(
+        log.debug("Calling fal.ai API with image URL: %s", image_url)
+        result = fal().subscribe(
             "fal-ai/bria/background/remove",
             arguments={
                 "image_url": image_url
             },
             with_logs=True,
-            on_queue_update=on_queue_update,
+            on_queue_update=fal_log_callback(log),
         )
-        print(f"Fal.ai API response: {result}")
+        log.debug("Fal.ai API response: %s", result)
         if result and isinstance(result, dict) and 'image' in result and 'url' in result['image']:
             return {'url': result['image']['url']}
         else:
-            print(f"Unexpected response format from fal.ai: {result}")
+            log.warning("Unexpected response format from fal.ai: %s", result)
             return None
     except Exception as e:
-        print(f"Error removing background: {str(e)}")
+        log.error("Error removing background: %s", e)
         return None
 
 def apply_effects(image_url, effects_prompt):
@@ -105,17 +122,17 @@ def apply_effects(image_url, effects_prompt):
         # This is a placeholder for the effects application step
         return None
     except Exception as e:
-        print(f"Error applying effects: {str(e)}")
+        log.error("Error applying effects: %s", e)
         return None
 
-def generate_audio(prompt):
+def generate_audio(prompt, voice_id=None):
     """Generate audio using ElevenLabs API"""
     try:
         # TODO: Implement ElevenLabs API integration
         # This is a placeholder for the audio generation step
         return None
     except Exception as e:
-        print(f"Error generating audio: {str(e)}")
+        log.error("Error generating audio: %s", e)
         return None
 
 def create_final_video(video_url, audio_url):
@@ -125,25 +142,32 @@ def create_final_video(video_url, audio_url):
         # This is a placeholder for the final video creation step
         return None
     except Exception as e:
-        print(f"Error creating final video: {str(e)}")
+        log.error("Error creating final video: %s", e)
         return None
 
-def process_image(image_path, effects_prompt=None, audio_prompt=None):
+def process_image(image_path, effects_prompt=None, audio_prompt=None, voice_id=None):
     """
     Main workflow: Process image through the complete pipeline
+
+    image_path can be a local file or a remote URL (Cloudinary fetches it).
     """
-    result = ProcessingResult(Path(image_path).stem)
+    result = ProcessingResult(Path(urlparse(image_path).path).stem, job_id=start_job())
+    started = time.monotonic()
     
     try:
         # Step 1: Upload to Cloudinary
-        print("\nStep 1: Uploading to Cloudinary...")
+        set_stage("upload")
+        result.start_stage("upload")
+        log.info("Step 1: Uploading to Cloudinary...")
         cloudinary_url = upload_to_cloudinary(image_path)
         if not cloudinary_url:
             raise Exception("Failed to upload to Cloudinary")
         result.cloudinary_url = cloudinary_url
 
         # Step 2: Remove background
-        print("\nStep 2: Removing background...")
+        set_stage("remove_background")
+        result.start_stage("remove_background")
+        log.info("Step 2: Removing background...")
         bg_removed = remove_background(cloudinary_url)
         if not bg_removed:
             raise Exception("Failed to remove background")
@@ -151,21 +175,27 @@ def process_image(image_path, effects_prompt=None, audio_prompt=None):
 
         # Step 3: Apply effects (if prompt provided)
         if effects_prompt:
-            print("\nStep 3: Applying effects...")
+            set_stage("effects")
+            result.start_stage("effects")
+            log.info("Step 3: Applying effects...")
             effects_result = apply_effects(result.background_removed_url, effects_prompt)
             if effects_result:
                 result.effects_video_url = effects_result
 
         # Step 4: Generate audio (if prompt provided)
         if audio_prompt:
-            print("\nStep 4: Generating audio...")
-            audio_result = generate_audio(audio_prompt)
+            set_stage("audio")
+            result.start_stage("audio")
+            log.info("Step 4: Generating audio...")
+            audio_result = generate_audio(audio_prompt, voice_id=voice_id)
             if audio_result:
                 result.audio_url = audio_result
 
         # Step 5: Create final video (if both video and audio are available)
         if result.effects_video_url and result.audio_url:
-            print("\nStep 5: Creating final video...")
+            set_stage("final_video")
+            result.start_stage("final_video")
+            log.info("Step 5: Creating final video...")
             final_video = create_final_video(result.effects_video_url, result.audio_url)
             if final_video:
                 result.final_video_url = final_video
@@ -175,11 +205,13 @@ def process_image(image_path, effects_prompt=None, audio_prompt=None):
     except Exception as e:
         result.status = "failed"
         result.error = str(e)
-        print(f"Error in processing pipeline: {str(e)}")
-    
+        log.error("Error in processing pipeline: %s", e)
+
+    result.start_stage(None)
+    result.elapsed_seconds = round(time.monotonic() - started, 3)
     # Save processing result
     result_file = save_processing_result(result)
-    print(f"\nProcessing result saved to: {result_file}")
+    log.info("Processing result saved to: %s", result_file)
     
     return result
 
@@ -188,7 +220,7 @@ if __name__ == "__main__":
     script_dir = Path(__file__).parent
     assets_dir = script_dir / "assets"
     if not assets_dir.exists():
-        print(f"Assets directory not found at {assets_dir}")
+        log.warning("Assets directory not found at %s", assets_dir)
         exit(1)
 
     # Example prompts (these should be configurable)
@@ -196,7 +228,7 @@ if __name__ == "__main__":
     audio_prompt = "Generate a cheerful background music"
 
     for image_file in assets_dir.glob("*.jpg"):
-        print(f"\nProcessing {image_file.name}...")
+        log.info("Processing %s...", image_file.name)
         result = process_image(
             str(image_file),
             effects_prompt=effects_prompt,
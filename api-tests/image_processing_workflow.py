@@ -1,58 +1,42 @@
-import cloudinary
-import cloudinary.uploader
-import os
 from pathlib import Path
-from dotenv import load_dotenv
-import fal_client
 import time
-import requests
+from clients import cloudinary_uploader, fal, http
+from pipeline_log import get_logger, fal_log_callback
 
-# Load environment variables
-load_dotenv()
-
-# Configure Cloudinary
-cloudinary.config(
-    cloud_name=os.getenv('CLOUDINARY_CLOUD_NAME'),
-    api_key=os.getenv('CLOUDINARY_API_KEY'),
-    api_secret=os.getenv('CLOUDINARY_API_SECRET')
-)
+log = get_logger(__name__)
 
 def upload_to_cloudinary(file_path):
     """
     Upload an image to Cloudinary and return the secure URL
     """
     try:
-        result = cloudinary.uploader.upload(
+        result = cloudinary_uploader().upload(
             file_path,
             folder="uploaded_images"
         )
-        print(f"Upload successful! URL: {result['secure_url']}")
+        log.info("Upload successful! URL: %s", result['secure_url'])
         return result['secure_url']
     except Exception as e:
-        print(f"Error uploading to Cloudinary: {str(e)}")
+        log.error("Error uploading to Cloudinary: %s", e)
         return None
 
 def remove_background(image_url):
     """
     Remove background from image using fal.ai
     """
-    def on_queue_update(update):
-        if isinstance(update, fal_client.InProgress):
-            for log in update.logs:
-                print(log["message"])
 
     try:
-        result = fal_client.subscribe(
+        result = fal().subscribe(
             "fal-ai/bria/background/remove",
             arguments={
                 "image_url": image_url
             },
             with_logs=True,
-            on_queue_update=on_queue_update,
+            on_queue_update=fal_log_callback(log),
         )
         return result
     except Exception as e:
-        print(f"Error removing background: {str(e)}")
+        log.error("Error removing background: %s", e)
         return None
 
 def save_processed_image(image_url, original_filename):
@@ -69,16 +53,16 @@ def save_processed_image(image_url, original_filename):
         output_path = processed_dir / filename
         
         # Download and save the image
-        response = requests.get(image_url)
+        response = http().get(image_url)
         response.raise_for_status()
         
         with open(output_path, 'wb') as f:
             f.write(response.content)
             
-        print(f"Processed image saved to: {output_path}")
+        log.info("Processed image saved to: %s", output_path)
         return str(output_path)
     except Exception as e:
-        print(f"Error saving processed image: {str(e)}")
+        log.error("Error saving processed image: %s", e)
         return None
 
 def process_image(image_path):
@@ -106,14 +90,14 @@ def process_image(image_path):
     # Step 1: Upload to Cloudinary
     cloudinary_url = upload_to_cloudinary(image_path)
     if not cloudinary_url:
-        print("Failed to upload to Cloudinary")
+        log.error("Failed to upload to Cloudinary")
         return
 
     # Step 2: Remove background using the Cloudinary URL
-    print("\nRemoving background...")
+    log.info("Removing background...")
     result = remove_background(cloudinary_url)
     if result:
-        print("\nBackground removal completed!")
+        log.info("Background removal completed!")
         
         # Step 3: Save the processed image
         if 'image' in result:
@@ -122,21 +106,21 @@ def process_image(image_path):
                 Path(image_path).name
             )
             if saved_path:
-                print(f"Final processed image saved at: {saved_path}")
+                log.info("Final processed image saved at: %s", saved_path)
         else:
-            print("No processed image found in result")
+            log.warning("No processed image found in result")
     else:
-        print("Failed to remove background")
+        log.error("Failed to remove background")
 
 if __name__ == "__main__":
     # Process all images in the assets folder
     assets_dir = Path("assets")
     if not assets_dir.exists():
-        print(f"Assets directory not found at {assets_dir}")
+        log.warning("Assets directory not found at %s", assets_dir)
         exit(1)
 
     for image_file in assets_dir.glob("*.jpg"):
-        print(f"\nProcessing {image_file.name}...")
+        log.info("Processing %s...", image_file.name)
         process_image(str(image_file))
         # Add a small delay between processing multiple images
         time.sleep(1) 
\ No newline at end of file
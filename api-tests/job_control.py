@@ -0,0 +1,160 @@
+"""
+Deadlines and cancellation for pipeline jobs.
+
+A job gets one overall time budget (Deadline) that is split across its stages
+by weight, plus a CancelToken that flips when the job is cancelled explicitly,
+the client disconnects, or the deadline runs out. fal.ai requests are polled
+through subscribe_cancellable so an in-flight queue request is cancelled
+upstream as soon as nobody is waiting for its result.
+"""
+import socket
+import threading
+import time
+
+from clients import fal
+from pipeline_log import get_logger
+from tracing import current_trace
+
+log = get_logger(__name__)
+
+# Relative share of the job budget each stage may use, in pipeline order
+STAGE_WEIGHTS = {
+    "upload": 0.05,
+    "remove_background": 0.10,
+    "video_effects": 0.40,
+    "audio": 0.08,
+    "audio_post": 0.02,
+    "lipsync": 0.35,
+}
+
+FAL_POLL_INTERVAL = 0.5
+
+
+class JobCancelled(Exception):
+    """Raised when a job stops early; reason is 'deadline', 'client_disconnected' or 'cancelled'"""
+    def __init__(self, stage, reason):
+        super().__init__(f"Job cancelled during {stage}: {reason}")
+        self.stage = stage
+        self.reason = reason
+
+
+class Deadline:
+    def __init__(self, total_seconds, stage_weights=STAGE_WEIGHTS):
+        self.total_seconds = total_seconds
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + total_seconds
+        self.stage_weights = stage_weights
+
+    def remaining(self):
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def elapsed(self):
+        return time.monotonic() - self.started_at
+
+    def expired(self):
+        return time.monotonic() >= self.expires_at
+
+    def stage_budget(self, stage):
+        """
+        Seconds this stage may use: its weighted share of whatever budget is
+        left for it and the stages after it. Time saved by earlier stages is
+        passed on to later ones.
+        """
+        stages = list(self.stage_weights)
+        if stage not in self.stage_weights:
+            return self.remaining()
+        later_weight = sum(self.stage_weights[s] for s in stages[stages.index(stage):])
+        return self.remaining() * self.stage_weights[stage] / later_weight
+
+
+class CancelToken:
+    def __init__(self, disconnect_probe=None):
+        self._event = threading.Event()
+        self._disconnect_probe = disconnect_probe
+        self.reason = None
+
+    def cancel(self, reason="cancelled"):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    def is_cancelled(self):
+        if not self._event.is_set() and self._disconnect_probe and self._disconnect_probe():
+            self.cancel("client_disconnected")
+        return self._event.is_set()
+
+    def check(self, stage, deadline=None, stage_expires_at=None):
+        """Raise JobCancelled if the job was cancelled or its (stage) deadline has passed"""
+        if self.is_cancelled():
+            raise JobCancelled(stage, self.reason)
+        if deadline is not None and deadline.expired():
+            self.cancel("deadline")
+            raise JobCancelled(stage, "deadline")
+        if stage_expires_at is not None and time.monotonic() >= stage_expires_at:
+            # Only this attempt is out of time; the job may still retry elsewhere
+            raise JobCancelled(stage, "deadline")
+
+
+def socket_disconnect_probe(environ):
+    """
+    Build a probe that reports whether the HTTP client has closed its connection,
+    using the raw socket the WSGI server exposes (werkzeug or gunicorn). Returns
+    None when the server doesn't expose one.
+    """
+    sock = environ.get("werkzeug.socket") or environ.get("gunicorn.socket")
+    if sock is None:
+        return None
+    flags = socket.MSG_PEEK | getattr(socket, "MSG_DONTWAIT", 0)
+
+    def is_disconnected():
+        try:
+            # The request body has been read, so an orderly EOF means the client hung up
+            return sock.recv(1, flags) == b""
+        except (BlockingIOError, InterruptedError):
+            return False
+        except OSError:
+            return True
+
+    return is_disconnected
+
+
+def subscribe_cancellable(application, arguments, on_queue_update=None,
+                          token=None, deadline=None, stage=None):
+    """
+    Drop-in for fal_client.subscribe that checks the cancel token and the job's
+    stage budget between queue polls, and cancels the upstream request when the
+    job stops.
+    """
+    stage_expires_at = None
+    if deadline is not None:
+        stage_expires_at = time.monotonic() + deadline.stage_budget(stage)
+    fal_client = fal()
+    handle = fal_client.submit(application, arguments=arguments)
+    trace = current_trace()
+    submitted_at = running_at = time.monotonic()
+
+    try:
+        for status in handle.iter_events(with_logs=True, interval=FAL_POLL_INTERVAL):
+            # The first non-queued status ends fal's queue wait; Completed ends execution
+            if trace and running_at == submitted_at and not isinstance(status, fal_client.Queued):
+                running_at = time.monotonic()
+                trace.add(f"fal queue {application}", "queue_wait", submitted_at, running_at,
+                          request_id=handle.request_id)
+            if trace and isinstance(status, fal_client.Completed):
+                trace.add(f"fal run {application}", "execution", running_at, time.monotonic(),
+                          request_id=handle.request_id)
+            if on_queue_update:
+                on_queue_update(status)
+            if token:
+                # A finished result is worth keeping even if it ran past the stage's
+                # share of the budget; only the job's overall deadline applies then
+                completed = isinstance(status, fal_client.Completed)
+                token.check(stage, deadline, None if completed else stage_expires_at)
+        return handle.get()
+    except JobCancelled:
+        try:
+            handle.cancel()
+            log.info("Cancelled fal.ai request %s for %s", handle.request_id, application)
+        except Exception as e:
+            log.warning("Could not cancel fal.ai request %s: %s", handle.request_id, e)
+        raise
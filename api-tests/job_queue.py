@@ -0,0 +1,287 @@
+"""
+Durable job queue for the video pipeline.
+
+Jobs are leased rather than popped: a worker that takes a job owns it until
+its lease expires, and keeps the lease alive with heartbeats while it works.
+If a worker crashes its heartbeats stop, the lease runs out and the job is
+handed to the next worker that asks. Jobs that keep failing are given up on
+after max_attempts leases.
+
+The default SQLiteBroker works for any number of worker processes sharing one
+host (or a local disk). To spread workers across hosts, write a module that
+calls register_broker() for a networked store, name it in JOB_QUEUE_BROKER and
+point JOB_QUEUE_URL at it:
+
+    JOB_QUEUE_BROKER=redis_broker JOB_QUEUE_URL=redis://queue-host:6379/0
+
+    broker = get_broker("sqlite:///jobs.db")
+    job_id = broker.enqueue({"effects_prompt": "..."})
+    job = broker.lease("worker-1", lease_seconds=60)
+"""
+import importlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+class Job:
+    def __init__(self, job_id, payload, status, attempts=0, worker_id=None,
+                 result=None, error=None, cancel_requested=False):
+        self.job_id = job_id
+        self.payload = payload
+        self.status = status
+        self.attempts = attempts
+        self.worker_id = worker_id
+        self.result = result
+        self.error = error
+        self.cancel_requested = cancel_requested
+
+    def to_dict(self):
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "attempts": self.attempts,
+            "worker_id": self.worker_id,
+            "result": self.result,
+            "error": self.error,
+            "cancel_requested": self.cancel_requested
+        }
+
+
+class Broker:
+    """
+    Interface every queue backend implements. Methods that take a worker_id
+    only succeed while that worker still holds the job's lease.
+    """
+    def enqueue(self, payload, job_id=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        """Add a job and return its id"""
+        raise NotImplementedError
+
+    def lease(self, worker_id, lease_seconds):
+        """Take the oldest available job (queued, or with an expired lease), or return None"""
+        raise NotImplementedError
+
+    def heartbeat(self, job_id, worker_id, lease_seconds):
+        """
+        Extend a lease. Returns False if the worker lost the lease or the job
+        was asked to cancel, in which case the worker should stop.
+        """
+        raise NotImplementedError
+
+    def complete(self, job_id, worker_id, result):
+        raise NotImplementedError
+
+    def fail(self, job_id, worker_id, error, status=FAILED, result=None):
+        """Record a final failure (or cancellation) for a leased job"""
+        raise NotImplementedError
+
+    def request_cancel(self, job_id):
+        """
+        Cancel a queued job, or flag a running one so its worker stops. Returns
+        False if the job is unknown or already finished
+        """
+        raise NotImplementedError
+
+    def get(self, job_id):
+        raise NotImplementedError
+
+
+class SQLiteBroker(Broker):
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    worker_id TEXT,
+                    lease_expires_at REAL,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)")
+
+    def _connect(self):
+        """One connection per thread; WAL lets readers run alongside the writer"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = _Transaction(conn)
+        return self._local.conn
+
+    def enqueue(self, payload, job_id=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        job_id = job_id or uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, payload, status, max_attempts, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, json.dumps(payload), QUEUED, max_attempts, now, now)
+            )
+        return job_id
+
+    def lease(self, worker_id, lease_seconds):
+        now = time.time()
+        with self._connect() as conn:
+            # Jobs whose worker died with no attempts left are given up on
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = 'Lease expired after final attempt', updated_at = ? "
+                "WHERE status = ? AND lease_expires_at < ? AND attempts >= max_attempts",
+                (FAILED, now, RUNNING, now)
+            )
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = 'Cancelled', updated_at = ? "
+                "WHERE status = ? AND lease_expires_at < ? AND cancel_requested = 1",
+                (CANCELLED, now, RUNNING, now)
+            )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE (status = ? OR (status = ? AND lease_expires_at < ?)) "
+                "AND cancel_requested = 0 ORDER BY created_at LIMIT 1",
+                (QUEUED, RUNNING, now)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker_id = ?, lease_expires_at = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE job_id = ?",
+                (RUNNING, worker_id, now + lease_seconds, now, row["job_id"])
+            )
+        job = self._row_to_job(row)
+        job.status = RUNNING
+        job.worker_id = worker_id
+        job.attempts += 1
+        return job
+
+    def heartbeat(self, job_id, worker_id, lease_seconds):
+        now = time.time()
+        with self._connect() as conn:
+            updated = conn.execute(
+                "UPDATE jobs SET lease_expires_at = ?, updated_at = ? "
+                "WHERE job_id = ? AND worker_id = ? AND status = ? AND cancel_requested = 0",
+                (now + lease_seconds, now, job_id, worker_id, RUNNING)
+            ).rowcount
+        return updated == 1
+
+    def _finish(self, job_id, worker_id, status, result=None, error=None):
+        with self._connect() as conn:
+            updated = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, lease_expires_at = NULL, updated_at = ? "
+                "WHERE job_id = ? AND worker_id = ? AND status = ?",
+                (status, json.dumps(result) if result is not None else None, error,
+                 time.time(), job_id, worker_id, RUNNING)
+            ).rowcount
+        return updated == 1
+
+    def complete(self, job_id, worker_id, result):
+        return self._finish(job_id, worker_id, COMPLETED, result=result)
+
+    def fail(self, job_id, worker_id, error, status=FAILED, result=None):
+        return self._finish(job_id, worker_id, status, result=result, error=error)
+
+    def request_cancel(self, job_id):
+        now = time.time()
+        with self._connect() as conn:
+            cancelled = conn.execute(
+                "UPDATE jobs SET status = ?, cancel_requested = 1, error = 'Cancelled before start', "
+                "updated_at = ? WHERE job_id = ? AND status = ?",
+                (CANCELLED, now, job_id, QUEUED)
+            ).rowcount
+            # Finished jobs are left alone
+            flagged = conn.execute(
+                "UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE job_id = ? AND status = ?",
+                (now, job_id, RUNNING)
+            ).rowcount
+        return cancelled + flagged == 1
+
+    def get(self, job_id):
+        row = self._connect().execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    @staticmethod
+    def _row_to_job(row):
+        return Job(
+            row["job_id"],
+            json.loads(row["payload"]),
+            row["status"],
+            attempts=row["attempts"],
+            worker_id=row["worker_id"],
+            result=json.loads(row["result"]) if row["result"] else None,
+            error=row["error"],
+            cancel_requested=bool(row["cancel_requested"])
+        )
+
+
+class _Transaction:
+    """
+    Wrap an autocommit sqlite3 connection so `with conn:` runs the block in a
+    BEGIN IMMEDIATE transaction, taking the write lock up front so two workers
+    can never lease the same job.
+    """
+    def __init__(self, conn):
+        self._conn = conn
+
+    def execute(self, *args):
+        return self._conn.execute(*args)
+
+    def __enter__(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+# URL scheme -> factory taking the rest of the URL
+BROKERS = {
+    "sqlite": lambda location: SQLiteBroker(location),
+}
+
+
+def register_broker(scheme, factory):
+    """Plug in another queue backend, e.g. register_broker("redis", RedisBroker)"""
+    BROKERS[scheme] = factory
+
+
+def load_broker_plugins(modules=None):
+    """
+    Import the comma-separated modules in JOB_QUEUE_BROKER; each one registers
+    its broker with register_broker() when imported
+    """
+    modules = modules if modules is not None else os.getenv("JOB_QUEUE_BROKER", "")
+    for name in filter(None, (m.strip() for m in modules.split(","))):
+        importlib.import_module(name)
+
+
+def get_broker(url):
+    """Build a broker from a URL like sqlite:///var/lib/vibe-veed/jobs.db"""
+    load_broker_plugins()
+    scheme, sep, location = url.partition("://")
+    if not sep or scheme not in BROKERS:
+        raise ValueError(f"Unsupported job queue URL: {url}")
+    if scheme == "sqlite":
+        # sqlite:///relative.db and sqlite:////absolute/path.db, as in SQLAlchemy
+        location = location[1:] if location.startswith("/") else location
+    return BROKERS[scheme](location)
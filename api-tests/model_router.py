@@ -0,0 +1,199 @@
+"""
+Latency-aware routing across alternative models for each pipeline stage.
+
+Every stage has a list of interchangeable candidate models (same inputs and
+outputs), each tagged with a quality tier. For each call the router keeps the
+candidates at or above the requested tier and orders them: healthy models by
+their recent median latency, then models it has no data for yet (in config
+order), then unhealthy ones. The first candidate is tried and, if it fails,
+the next one. A small share of calls go to a random other candidate first so
+the router notices when a slower or unhealthy model recovers.
+
+Stats are kept in memory per process over a rolling window of recent calls.
+
+Environment:
+    MODEL_ROUTES           path to a JSON file replacing STAGE_CANDIDATES
+    DEFAULT_QUALITY_TIER   tier used when a request doesn't set one (default standard)
+    ROUTER_EXPLORE_RATE    share of calls that try a non-leading model first (default 0.05)
+"""
+import json
+import os
+import random
+import statistics
+import threading
+import time
+from collections import deque
+
+from job_control import JobCancelled
+from pipeline_log import get_logger
+
+log = get_logger(__name__)
+
+QUALITY_TIERS = ["draft", "standard", "high"]
+
+# The first candidate of each stage is the model the pipeline used before routing
+STAGE_CANDIDATES = {
+    "remove_background": [
+        {"model": "fal-ai/bria/background/remove", "tier": "high"},
+        {"model": "fal-ai/birefnet/v2", "tier": "standard"},
+    ],
+    "video_effects": [
+        {"model": "fal-ai/pixverse/v4.5/image-to-video/fast", "tier": "standard"},
+        {"model": "fal-ai/pixverse/v4.5/image-to-video", "tier": "high"},
+        {"model": "fal-ai/ltx-video/image-to-video", "tier": "draft"},
+    ],
+    "audio": [
+        {"model": "eleven_monolingual_v1", "tier": "standard"},
+        {"model": "eleven_flash_v2_5", "tier": "standard"},
+        {"model": "eleven_multilingual_v2", "tier": "high"},
+    ],
+    "lipsync": [
+        {"model": "veed/lipsync", "tier": "high"},
+        {"model": "fal-ai/sync-lipsync", "tier": "standard"},
+        {"model": "fal-ai/latentsync", "tier": "standard"},
+    ],
+}
+
+DEFAULT_QUALITY_TIER = os.getenv("DEFAULT_QUALITY_TIER", "standard")
+ROUTER_EXPLORE_RATE = float(os.getenv("ROUTER_EXPLORE_RATE", 0.05))
+
+WINDOW_SIZE = 20
+MIN_SAMPLES = 3
+MAX_FAILURE_RATE = 0.5
+MAX_ATTEMPTS = 2
+
+
+class ModelStats:
+    """Rolling window of (latency seconds, succeeded) observations for one model"""
+    def __init__(self, window_size=WINDOW_SIZE):
+        self.calls = deque(maxlen=window_size)
+
+    def record(self, latency, ok):
+        self.calls.append((latency, ok))
+
+    def failure_rate(self):
+        if not self.calls:
+            return 0.0
+        return sum(1 for _, ok in self.calls if not ok) / len(self.calls)
+
+    def median_latency(self):
+        latencies = [latency for latency, ok in self.calls if ok]
+        return statistics.median(latencies) if latencies else None
+
+    def healthy(self):
+        return len(self.calls) < MIN_SAMPLES or self.failure_rate() <= MAX_FAILURE_RATE
+
+    def to_dict(self):
+        median = self.median_latency()
+        return {
+            "samples": len(self.calls),
+            "median_latency": round(median, 3) if median is not None else None,
+            "failure_rate": round(self.failure_rate(), 3),
+            "healthy": self.healthy()
+        }
+
+
+class ModelRouter:
+    def __init__(self, stage_candidates=None, explore_rate=ROUTER_EXPLORE_RATE):
+        self.stage_candidates = stage_candidates or load_stage_candidates()
+        self.explore_rate = explore_rate
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _stats_for(self, model):
+        stats = self._stats.get(model)
+        if stats is None:
+            stats = self._stats[model] = ModelStats()
+        return stats
+
+    def candidates(self, stage, tier=None):
+        """
+        Candidate models for a stage at or above the requested quality tier,
+        best first. Falls back to every candidate if none meets the tier.
+        """
+        tier = tier if tier in QUALITY_TIERS else DEFAULT_QUALITY_TIER
+        all_candidates = self.stage_candidates.get(stage, [])
+        eligible = [c for c in all_candidates
+                    if QUALITY_TIERS.index(c["tier"]) >= QUALITY_TIERS.index(tier)] or all_candidates
+
+        with self._lock:
+            def rank(indexed):
+                index, candidate = indexed
+                stats = self._stats_for(candidate["model"])
+                median = stats.median_latency()
+                if not stats.healthy():
+                    return (2, index)
+                if median is None:
+                    return (1, index)
+                return (0, median)
+
+            ordered = [c for _, c in sorted(enumerate(eligible), key=rank)]
+            if len(ordered) > 1 and random.random() < self.explore_rate:
+                # Any model but the leader, so stale stats (even a full window) get refreshed
+                explored = random.choice(ordered[1:])
+                ordered.remove(explored)
+                ordered.insert(0, explored)
+        return ordered
+
+    def record(self, model, latency, ok):
+        with self._lock:
+            self._stats_for(model).record(latency, ok)
+
+    def snapshot(self):
+        with self._lock:
+            return {model: stats.to_dict() for model, stats in self._stats.items()}
+
+    def call(self, stage, tier, fn, routing=None, max_attempts=MAX_ATTEMPTS, deadline=None):
+        """
+        Call fn(model) for the best candidates in turn until one returns
+        something other than None. A model that runs out of its stage budget
+        (JobCancelled with reason "deadline") counts as a failed call, and the
+        next candidate is tried while the job's deadline hasn't passed. Other
+        cancellations propagate without counting against the model. The
+        decision and every attempt are recorded in routing[stage].
+        """
+        candidates = self.candidates(stage, tier)[:max_attempts]
+        decision = {"tier": tier or DEFAULT_QUALITY_TIER, "model": None, "attempts": []}
+        if routing is not None:
+            routing[stage] = decision
+
+        for index, candidate in enumerate(candidates):
+            model = candidate["model"]
+            started = time.monotonic()
+            try:
+                output = fn(model)
+            except JobCancelled as e:
+                if e.reason != "deadline":
+                    # Cancelled or disconnected: says nothing about the model
+                    raise
+                latency = time.monotonic() - started
+                self.record(model, latency, False)
+                decision["attempts"].append({"model": model, "latency": round(latency, 3),
+                                             "ok": False, "timed_out": True})
+                if index == len(candidates) - 1 or deadline is None or deadline.expired():
+                    raise
+                log.warning("Model %s ran out of time for %s after %.1fs; trying next candidate",
+                            model, stage, latency)
+                continue
+            latency = time.monotonic() - started
+            ok = output is not None
+            self.record(model, latency, ok)
+            decision["attempts"].append({"model": model, "latency": round(latency, 3), "ok": ok})
+            if ok:
+                decision["model"] = model
+                return output
+            log.warning("Model %s failed for %s after %.1fs; trying next candidate", model, stage, latency)
+        return None
+
+
+def load_stage_candidates():
+    """STAGE_CANDIDATES, or the JSON file named by MODEL_ROUTES"""
+    routes_path = os.getenv("MODEL_ROUTES")
+    if not routes_path:
+        return STAGE_CANDIDATES
+    with open(routes_path) as f:
+        return json.load(f)
+
+
+# Shared by every job in the process so stats accumulate across requests
+router = ModelRouter()
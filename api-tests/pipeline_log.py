@@ -0,0 +1,182 @@
+"""
+Structured, queue-backed logging for the pipeline scripts and server.
+
+Log calls on request/worker threads only build a LogRecord and push it onto an
+in-memory queue; a single background listener thread formats and writes the
+records. Every record carries the current job id and pipeline stage, which are
+tracked in context variables so they follow each request or worker thread.
+Nothing is started at import: the listener and its atexit hook are set up when
+the first record is logged (or when an entry point calls configure_logging).
+
+    log = get_logger(__name__)
+    with job_context():
+        set_stage("remove_background")
+        log.info("Calling fal.ai")
+
+Environment:
+    LOG_LEVEL            minimum level (default INFO)
+    LOG_FORMAT           "json" (default) or "text"
+    FAL_LOG_SAMPLE_RATE  log 1 in N upstream fal.ai log lines (default 10)
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from clients import fal
+
+ROOT_LOGGER_NAME = "vibe_veed"
+
+_job_id = contextvars.ContextVar("job_id", default=None)
+_stage = contextvars.ContextVar("stage", default=None)
+_listener = None
+_queue_handler = None
+_configure_lock = threading.Lock()
+
+
+class JobContextFilter(logging.Filter):
+    """Stamp records with the job id and stage of the thread that logged them"""
+    def filter(self, record):
+        record.job_id = _job_id.get()
+        record.stage = _stage.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "job_id": getattr(record, "job_id", None),
+            "stage": getattr(record, "stage", None),
+            "message": record.getMessage(),
+        }
+        return json.dumps(entry, default=str)
+
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s [%(job_id)s:%(stage)s] %(name)s: %(message)s"
+
+
+def configure_logging(level=None, fmt=None, stream=None):
+    """
+    Start the background log listener. Safe to call more than once.
+    """
+    global _listener, _queue_handler
+    with _configure_lock:
+        if _listener is not None:
+            return
+
+        level = level or os.getenv("LOG_LEVEL", "INFO").upper()
+        fmt = fmt or os.getenv("LOG_FORMAT", "json")
+
+        output = logging.StreamHandler(stream or sys.stdout)
+        output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+        log_queue = queue.SimpleQueue()
+        _queue_handler = logging.handlers.QueueHandler(log_queue)
+        # Runs on the logging thread, so it sees that thread's job context
+        _queue_handler.addFilter(JobContextFilter())
+
+        root = logging.getLogger(ROOT_LOGGER_NAME)
+        root.setLevel(level)
+        root.removeHandler(_placeholder)
+        root.addHandler(_queue_handler)
+
+        _listener = logging.handlers.QueueListener(log_queue, output)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+
+class _ConfigureOnFirstRecord(logging.Handler):
+    """Stands in for the queue handler until the first record is logged"""
+    def handle(self, record):
+        configure_logging()
+        if record.levelno >= logging.getLogger(ROOT_LOGGER_NAME).getEffectiveLevel():
+            _queue_handler.handle(record)
+        return True
+
+    def emit(self, record):
+        pass
+
+
+# Until configured, let every record through to the placeholder; the real
+# level is applied (and this record re-checked against it) on configuration
+_placeholder = _ConfigureOnFirstRecord()
+_root = logging.getLogger(ROOT_LOGGER_NAME)
+_root.setLevel(logging.DEBUG)
+_root.addHandler(_placeholder)
+_root.propagate = False
+
+
+def get_logger(name):
+    """Return a logger under the pipeline's root logger"""
+    short_name = name.rsplit(".", 1)[-1].replace("-", "_")
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{short_name}")
+
+
+def new_job_id():
+    return uuid.uuid4().hex[:12]
+
+
+def start_job(job_id=None):
+    """Bind a job id (generated if not given) to the current context and clear its stage"""
+    job_id = job_id or new_job_id()
+    _job_id.set(job_id)
+    _stage.set(None)
+    return job_id
+
+
+@contextmanager
+def job_context(job_id=None):
+    """Tag every record logged inside the block with a job id (generated if not given)"""
+    job_token = _job_id.set(job_id or new_job_id())
+    stage_token = _stage.set(None)
+    try:
+        yield _job_id.get()
+    finally:
+        _stage.reset(stage_token)
+        _job_id.reset(job_token)
+
+
+def current_job_id():
+    return _job_id.get()
+
+
+def set_stage(stage):
+    """Set the pipeline stage reported on records logged from this context"""
+    _stage.set(stage)
+
+
+def fal_log_callback(logger, sample_rate=None):
+    """
+    Build an on_queue_update callback for fal_client that forwards upstream
+    log lines, keeping only 1 in sample_rate of them at INFO. Every line is
+    still available at DEBUG.
+    """
+    in_progress = fal().InProgress
+
+    if sample_rate is None:
+        sample_rate = int(os.getenv("FAL_LOG_SAMPLE_RATE", 10))
+    sample_rate = max(sample_rate, 1)
+    seen = [0]
+
+    def on_queue_update(update):
+        if not isinstance(update, in_progress):
+            return
+        for log in update.logs:
+            seen[0] += 1
+            if seen[0] % sample_rate == 1 or sample_rate == 1:
+                logger.info("fal: %s", log["message"])
+            else:
+                logger.debug("fal: %s", log["message"])
+
+    return on_queue_update
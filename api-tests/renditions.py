@@ -0,0 +1,141 @@
+"""
+Delivery renditions of the final lipsync video.
+
+The lipsync output is a full-quality MP4, which is more than mobile viewers
+need. This optional stage downloads it once and transcodes a small ladder of
+H.264 renditions (faststart, so playback starts before the download ends)
+plus a poster frame with ffmpeg, in a process pool, one task per rendition.
+
+Environment:
+    RENDITIONS           set to 1 to build renditions for every job (default off)
+    RENDITION_HEIGHTS    comma-separated ladder heights (default 360,720)
+    RENDITION_WORKERS    process pool size (default 2)
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from pathlib import Path
+
+from clients import http
+from pipeline_log import get_logger
+
+log = get_logger(__name__)
+
+RENDITIONS = os.getenv('RENDITIONS', '0').lower() in ('1', 'true', 'yes')
+RENDITION_HEIGHTS = [int(h) for h in os.getenv('RENDITION_HEIGHTS', '360,720').split(',') if h.strip()]
+RENDITION_WORKERS = int(os.getenv('RENDITION_WORKERS', 2))
+
+FFMPEG_TIMEOUT = 300
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=RENDITION_WORKERS)
+        return _pool
+
+
+def run_ffmpeg(args, ends_at=None):
+    """
+    Run ffmpeg, killing it at FFMPEG_TIMEOUT or at ends_at (a time.time()
+    value), whichever comes first
+    """
+    timeout = FFMPEG_TIMEOUT
+    if ends_at is not None:
+        timeout = min(timeout, ends_at - time.time())
+        if timeout <= 0:
+            raise subprocess.TimeoutExpired(args, 0)
+    # subprocess.run kills the child when the timeout expires
+    subprocess.run(args, capture_output=True, check=True, timeout=timeout)
+
+
+def transcode_rendition(source_path, output_path, height, ends_at=None):
+    """Scale to the given height (never upscaling) as a faststart H.264/AAC MP4"""
+    run_ffmpeg(
+        ['ffmpeg', '-v', 'error', '-y', '-i', source_path,
+         '-vf', f"scale=-2:'min({height},ih)'",
+         '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '26', '-pix_fmt', 'yuv420p',
+         '-c:a', 'aac', '-b:a', '96k',
+         '-movflags', '+faststart', output_path],
+        ends_at
+    )
+    return output_path
+
+
+def extract_poster(source_path, output_path, ends_at=None):
+    """Grab the first frame as a JPEG poster image"""
+    run_ffmpeg(
+        ['ffmpeg', '-v', 'error', '-y', '-i', source_path,
+         '-frames:v', '1', '-q:v', '3', output_path],
+        ends_at
+    )
+    return output_path
+
+
+def download_video(url, path, timeout=60):
+    """Stream a video to disk"""
+    with http().get(url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        with open(path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+    return path
+
+
+def build_renditions(video_url, upload, heights=None, timeout=None):
+    """
+    Transcode video_url into the rendition ladder and a poster frame, then
+    store each one with upload(path, resource_type) -> URL. Returns a dict like
+    {'360p': url, '720p': url, 'poster': url}, or None if renditions couldn't be
+    built. Failures never fail the job; the original video is still delivered.
+    """
+    if not shutil.which('ffmpeg'):
+        log.warning("ffmpeg not found; skipping renditions")
+        return None
+
+    heights = heights or RENDITION_HEIGHTS
+    # Each ffmpeg run is killed at this time, so none outlives the work directory
+    ends_at = time.time() + timeout if timeout is not None else None
+    with tempfile.TemporaryDirectory(prefix='renditions-') as work_dir:
+        try:
+            source_path = download_video(video_url, str(Path(work_dir) / 'source.mp4'),
+                                         timeout=min(60, timeout) if timeout is not None else 60)
+        except Exception as e:
+            log.warning("Could not download final video for renditions: %s", e)
+            return None
+
+        pool = _get_pool()
+        tasks = {
+            f"{height}p": pool.submit(transcode_rendition, source_path,
+                                      str(Path(work_dir) / f"{height}p.mp4"), height, ends_at)
+            for height in heights
+        }
+        tasks['poster'] = pool.submit(extract_poster, source_path, str(Path(work_dir) / 'poster.jpg'), ends_at)
+        done, not_done = wait(tasks.values(), timeout=timeout)
+        # Drop queued tasks, then let started ones reach ends_at and kill their ffmpeg
+        for future in not_done:
+            future.cancel()
+        wait(not_done)
+
+        renditions = {}
+        for name, future in tasks.items():
+            if future not in done or future.exception() is not None:
+                log.warning("Rendition %s failed: %s", name,
+                            future.exception() if future in done else 'timed out')
+                continue
+            resource_type = 'image' if name == 'poster' else 'video'
+            url = upload(future.result(), resource_type)
+            if url:
+                renditions[name] = url
+
+    log.info("Built %s rendition(s)", len(renditions))
+    return renditions or None
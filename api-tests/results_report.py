@@ -0,0 +1,257 @@
+"""
+Report on historical processing results written by save_processing_result.
+
+Scans processing_results/*.json in parallel and aggregates job counts,
+statuses and latency percentiles by day, hour, status, image, stage or
+failure cause, printed as a table or CSV.
+
+Scans are incremental: each file is reduced to a compact summary row kept in a
+cache next to the results, and a checkpoint remembers the newest file
+modification time seen. The next run only parses files changed since then and
+rewrites the cache with one row per result file that still exists.
+
+Usage:
+    python results_report.py                      # by day
+    python results_report.py --by stage --csv
+    python results_report.py --by error --since 2025-05-01
+    python results_report.py --rebuild            # ignore the cache and rescan everything
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+CACHE_FILENAME = ".report_cache.jsonl"
+CHECKPOINT_FILENAME = ".report_checkpoint.json"
+CHUNK_SIZE = 256
+
+GROUPINGS = ("day", "hour", "status", "image", "stage", "error")
+
+
+def summarize_file(path):
+    """Reduce one result file to the fields the report needs, or None if unreadable"""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    timestamp = data.get("timestamp") or ""
+    return {
+        "file": os.path.basename(path),
+        "day": timestamp[:10],
+        "hour": timestamp[:13].replace("T", " "),
+        "status": data.get("status") or "unknown",
+        "image": data.get("image_name"),
+        "error": data.get("error") or data.get("cancel_reason"),
+        "elapsed": data.get("elapsed_seconds"),
+        "stages": data.get("stage_seconds") or {}
+    }
+
+
+def summarize_chunk(paths):
+    return [row for row in map(summarize_file, paths) if row is not None]
+
+
+def scan_new_files(results_dir, checkpoint):
+    """
+    List result files modified since the checkpoint. Returns (paths, new checkpoint).
+    Files sharing the checkpoint's exact mtime are told apart by name.
+    """
+    last_mtime = checkpoint.get("mtime_ns", 0)
+    seen_at_last = set(checkpoint.get("files_at_mtime", []))
+    paths = []
+    newest = last_mtime
+    files_at_newest = set(seen_at_last)
+
+    with os.scandir(results_dir) as entries:
+        for entry in entries:
+            # Dotfiles are the report's own cache and checkpoint, not job results
+            if entry.name.startswith(".") or not entry.name.endswith(".json") or not entry.is_file():
+                continue
+            mtime = entry.stat().st_mtime_ns
+            if mtime < last_mtime or (mtime == last_mtime and entry.name in seen_at_last):
+                continue
+            paths.append(entry.path)
+            if mtime > newest:
+                newest = mtime
+                files_at_newest = {entry.name}
+            elif mtime == newest:
+                files_at_newest.add(entry.name)
+
+    return paths, {"mtime_ns": newest, "files_at_mtime": sorted(files_at_newest)}
+
+
+def update_cache(results_dir, workers=None, rebuild=False):
+    """
+    Parse files changed since the last run and merge their summaries into the
+    cache, dropping rows for files that have been deleted. The cache is
+    rewritten through a temp file, so it stays at one row per result file.
+    Returns the number of files parsed.
+    """
+    cache_path = os.path.join(results_dir, CACHE_FILENAME)
+    checkpoint_path = os.path.join(results_dir, CHECKPOINT_FILENAME)
+
+    checkpoint = {}
+    if not rebuild and os.path.exists(checkpoint_path) and os.path.exists(cache_path):
+        with open(checkpoint_path) as f:
+            checkpoint = json.load(f)
+
+    paths, new_checkpoint = scan_new_files(results_dir, checkpoint)
+    chunks = [paths[i:i + CHUNK_SIZE] for i in range(0, len(paths), CHUNK_SIZE)]
+
+    latest = {}
+    if checkpoint:
+        existing = set(os.listdir(results_dir))
+        latest = {row["file"]: row for row in iter_summaries(results_dir) if row["file"] in existing}
+
+    if len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for rows in pool.map(summarize_chunk, chunks):
+                latest.update((row["file"], row) for row in rows)
+    else:
+        for chunk in chunks:
+            latest.update((row["file"], row) for row in summarize_chunk(chunk))
+
+    temp_path = cache_path + ".tmp"
+    with open(temp_path, "w") as cache:
+        cache.writelines(json.dumps(row) + "\n" for row in latest.values())
+    os.replace(temp_path, cache_path)
+
+    # Written last, so an interrupted scan is simply repeated next time
+    with open(checkpoint_path, "w") as f:
+        json.dump(new_checkpoint, f)
+    return len(paths)
+
+
+def iter_summaries(results_dir):
+    """Summary rows from the cache, keeping only the latest row for each file"""
+    latest = {}
+    with open(os.path.join(results_dir, CACHE_FILENAME)) as cache:
+        for line in cache:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            latest[row["file"]] = row
+    return iter(latest.values())
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def aggregate(rows, by, since=None):
+    """
+    Group summary rows and compute counts and latency percentiles per group.
+    Grouping by stage uses per-stage durations; every other grouping uses the
+    job's end-to-end time.
+    """
+    groups = defaultdict(lambda: {"jobs": 0, "statuses": defaultdict(int), "latencies": []})
+    for row in rows:
+        if since and row["day"] < since:
+            continue
+        if by == "stage":
+            for stage, seconds in row["stages"].items():
+                group = groups[stage]
+                group["jobs"] += 1
+                group["statuses"][row["status"]] += 1
+                group["latencies"].append(seconds)
+            continue
+
+        if by == "error":
+            if row["status"] == "completed":
+                continue
+            key = row["error"] or "unknown"
+        else:
+            key = row[by] or "unknown"
+        group = groups[key]
+        group["jobs"] += 1
+        group["statuses"][row["status"]] += 1
+        if row["elapsed"] is not None:
+            group["latencies"].append(row["elapsed"])
+
+    report = []
+    for key in sorted(groups):
+        group = groups[key]
+        latencies = sorted(group["latencies"])
+        report.append({
+            by: key,
+            "jobs": group["jobs"],
+            "completed": group["statuses"].get("completed", 0),
+            "failed": group["statuses"].get("failed", 0),
+            "cancelled": group["statuses"].get("cancelled", 0),
+            "p50_s": _round(percentile(latencies, 50)),
+            "p90_s": _round(percentile(latencies, 90)),
+            "p99_s": _round(percentile(latencies, 99)),
+        })
+    return report
+
+
+def print_table(report, out=sys.stdout):
+    if not report:
+        print("No results", file=out)
+        return
+    columns = list(report[0])
+    cells = [[_format(row[c]) for c in columns] for row in report]
+    widths = [max(len(c), *(len(r[i]) for r in cells)) for i, c in enumerate(columns)]
+    # Left-align the group key, right-align the numbers
+    print("  ".join(c.ljust(w) if i == 0 else c.rjust(w)
+                    for i, (c, w) in enumerate(zip(columns, widths))), file=out)
+    for row in cells:
+        print("  ".join(v.ljust(w) if i == 0 else v.rjust(w)
+                        for i, (v, w) in enumerate(zip(row, widths))), file=out)
+
+
+def print_csv(report, out=sys.stdout):
+    if not report:
+        return
+    writer = csv.DictWriter(out, fieldnames=list(report[0]))
+    writer.writeheader()
+    writer.writerows(report)
+
+
+def _round(value):
+    return round(value, 3) if value is not None else None
+
+
+def _format(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Summarize processing results')
+    parser.add_argument('--results-dir', default='processing_results',
+                        help='Directory of result JSON files (default: processing_results)')
+    parser.add_argument('--by', choices=GROUPINGS, default='day',
+                        help='Group results by this field (default: day)')
+    parser.add_argument('--since', help='Only include results from this day on (YYYY-MM-DD)')
+    parser.add_argument('--csv', action='store_true', help='Print CSV instead of a table')
+    parser.add_argument('--workers', type=int, help='Parser processes (default: CPU count)')
+    parser.add_argument('--rebuild', action='store_true', help='Ignore the cache and rescan every file')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.results_dir):
+        print(f"Results directory not found at {args.results_dir}", file=sys.stderr)
+        sys.exit(1)
+
+    parsed = update_cache(args.results_dir, workers=args.workers, rebuild=args.rebuild)
+    print(f"Parsed {parsed} new or changed result file(s)", file=sys.stderr)
+
+    report = aggregate(iter_summaries(args.results_dir), args.by, since=args.since)
+    if args.csv:
+        print_csv(report)
+    else:
+        print_table(report)
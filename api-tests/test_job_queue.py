@@ -0,0 +1,128 @@
+"""
+Tests for the SQLite job broker, each against a fresh database file.
+
+    python -m pytest api-tests/test_job_queue.py
+
+A negative lease_seconds gives a lease that has already expired, which stands
+in for a worker that stopped heartbeating.
+"""
+import pytest
+
+from job_queue import SQLiteBroker, QUEUED, RUNNING, COMPLETED, FAILED, CANCELLED
+
+EXPIRED = -1
+
+
+@pytest.fixture
+def broker(tmp_path):
+    return SQLiteBroker(str(tmp_path / "jobs.db"))
+
+
+def test_lease_takes_oldest_queued_job(broker):
+    first = broker.enqueue({"n": 1})
+    broker.enqueue({"n": 2})
+
+    job = broker.lease("worker-1", lease_seconds=60)
+    assert job.job_id == first
+    assert job.payload == {"n": 1}
+    assert job.status == RUNNING
+    assert job.attempts == 1
+    assert broker.get(first).worker_id == "worker-1"
+
+
+def test_live_lease_is_not_handed_out_again(broker):
+    broker.enqueue({})
+    broker.lease("worker-1", lease_seconds=60)
+    assert broker.lease("worker-2", lease_seconds=60) is None
+
+
+def test_expired_lease_is_handed_to_next_worker(broker):
+    job_id = broker.enqueue({})
+    broker.lease("worker-1", lease_seconds=EXPIRED)
+
+    job = broker.lease("worker-2", lease_seconds=60)
+    assert job.job_id == job_id
+    assert job.worker_id == "worker-2"
+    assert job.attempts == 2
+
+
+def test_stale_worker_cannot_heartbeat_or_finish(broker):
+    job_id = broker.enqueue({})
+    broker.lease("worker-1", lease_seconds=EXPIRED)
+    broker.lease("worker-2", lease_seconds=60)
+
+    assert not broker.heartbeat(job_id, "worker-1", lease_seconds=60)
+    assert not broker.complete(job_id, "worker-1", {"final_video_url": "stale"})
+    assert not broker.fail(job_id, "worker-1", "stale")
+
+    assert broker.heartbeat(job_id, "worker-2", lease_seconds=60)
+    assert broker.complete(job_id, "worker-2", {"final_video_url": "ok"})
+    job = broker.get(job_id)
+    assert job.status == COMPLETED
+    assert job.result == {"final_video_url": "ok"}
+
+
+def test_finished_job_cannot_be_finished_again(broker):
+    job_id = broker.enqueue({})
+    broker.lease("worker-1", lease_seconds=60)
+    assert broker.fail(job_id, "worker-1", "boom")
+    assert not broker.complete(job_id, "worker-1", {})
+    assert broker.get(job_id).status == FAILED
+
+
+def test_cancel_queued_job(broker):
+    job_id = broker.enqueue({})
+    assert broker.request_cancel(job_id)
+    assert broker.get(job_id).status == CANCELLED
+    assert broker.lease("worker-1", lease_seconds=60) is None
+
+
+def test_cancel_running_job_flags_it(broker):
+    job_id = broker.enqueue({})
+    broker.lease("worker-1", lease_seconds=60)
+
+    assert broker.request_cancel(job_id)
+    job = broker.get(job_id)
+    assert job.status == RUNNING
+    assert job.cancel_requested
+    # The next heartbeat tells the worker to stop
+    assert not broker.heartbeat(job_id, "worker-1", lease_seconds=60)
+    assert broker.fail(job_id, "worker-1", "Cancelled", status=CANCELLED)
+    assert broker.get(job_id).status == CANCELLED
+
+
+def test_cancelled_running_job_with_expired_lease_is_not_retried(broker):
+    job_id = broker.enqueue({})
+    broker.lease("worker-1", lease_seconds=EXPIRED)
+    broker.request_cancel(job_id)
+
+    assert broker.lease("worker-2", lease_seconds=60) is None
+    assert broker.get(job_id).status == CANCELLED
+
+
+@pytest.mark.parametrize("status", [COMPLETED, FAILED])
+def test_cancel_finished_job_is_refused(broker, status):
+    job_id = broker.enqueue({})
+    broker.lease("worker-1", lease_seconds=60)
+    broker.fail(job_id, "worker-1", "done", status=status)
+
+    assert not broker.request_cancel(job_id)
+    job = broker.get(job_id)
+    assert job.status == status
+    assert not job.cancel_requested
+
+
+def test_cancel_unknown_job_is_refused(broker):
+    assert not broker.request_cancel("missing")
+
+
+def test_job_is_given_up_after_max_attempts(broker):
+    job_id = broker.enqueue({}, max_attempts=2)
+    broker.lease("worker-1", lease_seconds=EXPIRED)
+    broker.lease("worker-2", lease_seconds=EXPIRED)
+
+    assert broker.lease("worker-3", lease_seconds=60) is None
+    job = broker.get(job_id)
+    assert job.status == FAILED
+    assert job.attempts == 2
+    assert job.error == "Lease expired after final attempt"
@@ -0,0 +1,193 @@
+"""
+Per-job span traces.
+
+A trace is a flat list of timed spans for one job: a span per pipeline stage,
+per outgoing HTTP call (Cloudinary, ElevenLabs, fal.ai), and for each fal.ai
+request the time spent waiting in fal's queue versus executing. Traces follow
+the job through a context variable, so code that runs outside a traced job
+pays only for one lookup.
+
+    trace = start_trace(job_id)
+    with span("upload", "stage"):
+        ...
+    print(render_waterfall(trace.to_list()))
+
+HTTP calls are captured by wrapping urllib3 (used by requests and Cloudinary)
+and httpx (used by fal_client) the first time a trace starts.
+
+Tracing is off by default. It can be switched on for a limited window at
+runtime (set_tracing), per request, or for the whole process with TRACE_JOBS=1.
+
+Environment:
+    TRACE_JOBS    set to 1 to trace every job (default off)
+"""
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+_trace = contextvars.ContextVar("trace", default=None)
+
+MAX_SPANS = 2000
+
+# Monotonic time until which new jobs are traced
+_enabled_until = float("inf") if os.getenv("TRACE_JOBS", "0").lower() in ("1", "true", "yes") else 0.0
+
+
+class Trace:
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.started_at = time.time()
+        self._origin = time.monotonic()
+        self.spans = []
+        self._lock = threading.Lock()
+        self._stage = None
+
+    def add(self, name, kind, start, end, **attrs):
+        """Record a span from monotonic start/end times"""
+        with self._lock:
+            if len(self.spans) >= MAX_SPANS:
+                return
+            self.spans.append({
+                "name": name,
+                "kind": kind,
+                "start": round(start - self._origin, 4),
+                "duration": round(end - start, 4),
+                **attrs
+            })
+
+    def start_stage(self, stage):
+        """Close the current stage span and open the next one (None just closes)"""
+        now = time.monotonic()
+        if self._stage is not None:
+            name, started = self._stage
+            self.add(name, "stage", started, now)
+        self._stage = (stage, now) if stage is not None else None
+
+    def to_list(self):
+        with self._lock:
+            return sorted(self.spans, key=lambda s: s["start"])
+
+
+def set_tracing(enabled, seconds=None):
+    """Trace new jobs from now on, or only for the next `seconds`, or stop tracing them"""
+    global _enabled_until
+    if not enabled:
+        _enabled_until = 0.0
+    elif seconds is None:
+        _enabled_until = float("inf")
+    else:
+        _enabled_until = time.monotonic() + seconds
+
+
+def tracing_enabled():
+    return time.monotonic() < _enabled_until
+
+
+def tracing_status():
+    remaining = _enabled_until - time.monotonic()
+    return {
+        "enabled": remaining > 0,
+        "remaining_seconds": None if remaining == float("inf") else round(max(remaining, 0.0), 1)
+    }
+
+
+def start_trace(job_id):
+    """Begin tracing the job running in this context"""
+    instrument_http()
+    trace = Trace(job_id)
+    _trace.set(trace)
+    return trace
+
+
+def current_trace():
+    return _trace.get()
+
+
+def stop_trace():
+    """Close any open stage span and detach the trace from this context"""
+    trace = _trace.get()
+    if trace is not None:
+        trace.start_stage(None)
+        _trace.set(None)
+    return trace
+
+
+def trace_stage(stage):
+    trace = _trace.get()
+    if trace is not None:
+        trace.start_stage(stage)
+
+
+@contextmanager
+def span(name, kind, **attrs):
+    trace = _trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        trace.add(name, kind, started, time.monotonic(), **attrs)
+
+
+_instrumented = False
+_instrument_lock = threading.Lock()
+
+
+def instrument_http():
+    """Wrap urllib3 and httpx so HTTP calls made during a traced job become spans"""
+    global _instrumented
+    with _instrument_lock:
+        if _instrumented:
+            return
+        _instrumented = True
+
+    try:
+        from urllib3.connectionpool import HTTPConnectionPool
+        original_urlopen = HTTPConnectionPool.urlopen
+
+        def traced_urlopen(pool, method, url, *args, **kwargs):
+            if _trace.get() is None:
+                return original_urlopen(pool, method, url, *args, **kwargs)
+            with span(f"{method} {pool.host}{url.split('?')[0]}", "http"):
+                return original_urlopen(pool, method, url, *args, **kwargs)
+
+        HTTPConnectionPool.urlopen = traced_urlopen
+    except ImportError:
+        pass
+
+    try:
+        import httpx
+        original_send = httpx.Client.send
+
+        def traced_send(client, request, *args, **kwargs):
+            if _trace.get() is None:
+                return original_send(client, request, *args, **kwargs)
+            with span(f"{request.method} {request.url.host}{request.url.path}", "http"):
+                return original_send(client, request, *args, **kwargs)
+
+        httpx.Client.send = traced_send
+    except ImportError:
+        pass
+
+
+WATERFALL_WIDTH = 60
+
+
+def render_waterfall(spans, width=WATERFALL_WIDTH):
+    """Plain-text waterfall: one row per span, bars scaled to the whole trace"""
+    if not spans:
+        return "No spans recorded\n"
+    total = max(s["start"] + s["duration"] for s in spans) or 1.0
+    label_width = min(max(len(s["name"]) for s in spans), 50)
+    lines = [f"{'span'.ljust(label_width)}  {'kind'.ljust(10)} {'start':>8} {'dur':>8}  0s{' ' * (width - 4)}{total:.1f}s"]
+    for s in spans:
+        offset = int(s["start"] / total * width)
+        length = max(int(s["duration"] / total * width), 1)
+        bar = " " * offset + "#" * min(length, width - offset)
+        lines.append(f"{s['name'][:label_width].ljust(label_width)}  {s['kind'].ljust(10)} "
+                     f"{s['start']:8.2f} {s['duration']:8.2f}  |{bar.ljust(width)}|")
+    return "\n".join(lines) + "\n"
@@ -1,172 +1,149 @@
-from flask import Flask, request, jsonify
-import cloudinary
-import cloudinary.uploader
+from flask import Flask, Request, Response, request, jsonify, send_file, url_for, g, abort
 import os
+import hashlib
+import hmac
+import io
+import math
+from collections import OrderedDict
 from pathlib import Path
 from dotenv import load_dotenv
-import fal_client
 import time
-import tempfile
-import requests
 from werkzeug.utils import secure_filename
 
-# Load environment variables
+# Load environment variables before the pipeline modules read their settings
 load_dotenv()
 
-# Configure Cloudinary
-cloudinary.config(
-    cloud_name=os.getenv('CLOUDINARY_CLOUD_NAME'),
-    api_key=os.getenv('CLOUDINARY_API_KEY'),
-    api_secret=os.getenv('CLOUDINARY_API_SECRET')
-)
+from artifact_cache import ArtifactCache
+from pipeline_log import get_logger, start_job, set_stage
+from job_control import Deadline, CancelToken, JobCancelled, socket_disconnect_probe
+from job_queue import get_broker
+from image_processing_generated import ProcessingResult
+from video_pipeline import (PipelineError, run_pipeline, upload_to_cloudinary,
+                            processing_steps, record_outcome)
+from renditions import RENDITIONS
+from model_router import router, QUALITY_TIERS, DEFAULT_QUALITY_TIER
+from tracing import start_trace, stop_trace, set_tracing, tracing_enabled, tracing_status, render_waterfall
+from sampling_profiler import profile, ProfilerBusy, MAX_SECONDS as MAX_PROFILE_SECONDS
 
-# Configure ElevenLabs
-ELEVENLABS_API_KEY = os.getenv('ELEVENLABS_API_KEY')
-ELEVENLABS_VOICE_ID = os.getenv('ELEVENLABS_VOICE_ID', 'default_voice_id')  # You'll need to set this
+log = get_logger(__name__)
+
+# Upper bound on how long one job may run end to end; clients can ask for less
+JOB_DEADLINE_SECONDS = float(os.getenv('JOB_DEADLINE_SECONDS', 600))
+
+# job_id -> CancelToken for jobs currently running in this process
+active_jobs = {}
+
+# With JOB_QUEUE_URL set (e.g. sqlite:///jobs.db), jobs are queued for
+# video_worker.py processes instead of running inside the request
+JOB_QUEUE_URL = os.getenv('JOB_QUEUE_URL')
+job_broker = get_broker(JOB_QUEUE_URL) if JOB_QUEUE_URL else None
+
+# Traces of the most recent inline jobs; queued jobs keep theirs in the job result
+TRACE_HISTORY = int(os.getenv('TRACE_HISTORY', 100))
+recent_traces = OrderedDict()
+
+# The /debug endpoints (tracing toggle, profiler), job traces and the X-Trace
+# header only work when DEBUG_TOKEN is set, and only for requests sending it in
+# the X-Debug-Token header
+DEBUG_TOKEN = os.getenv('DEBUG_TOKEN')
+
+class InMemoryUploadRequest(Request):
+    """
+    Keep multipart uploads in memory instead of spooling them to a temp file.
+    MAX_CONTENT_LENGTH caps how large an upload can get.
+    """
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return io.BytesIO()
 
 app = Flask(__name__)
+app.request_class = InMemoryUploadRequest
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+# Let a fronting nginx/Apache stream cached artifacts with X-Sendfile. This is
+# the only zero-copy path for Range requests: werkzeug serves 206 responses
+# through its own range wrapper, which reads the file in Python
+app.config['USE_X_SENDFILE'] = os.getenv('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
+
+# Optional local mirror of pipeline artifacts, enabled by setting ARTIFACT_CACHE_DIR
+ARTIFACT_CACHE_DIR = os.getenv('ARTIFACT_CACHE_DIR')
+ARTIFACT_CACHE_MAX_BYTES = int(os.getenv('ARTIFACT_CACHE_MAX_BYTES', 2 * 1024 * 1024 * 1024))  # 2GB
+artifact_cache = ArtifactCache(ARTIFACT_CACHE_DIR, ARTIFACT_CACHE_MAX_BYTES) if ARTIFACT_CACHE_DIR else None
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def upload_to_cloudinary(file_path):
+def sniff_image_type(header):
     """
-    Upload an image to Cloudinary and return the secure URL
+    Detect the image type from its leading magic bytes, or None if it isn't an allowed image
     """
-    try:
-        result = cloudinary.uploader.upload(
-            file_path,
-            folder="uploaded_images"
-        )
-        print(f"Upload successful! URL: {result['secure_url']}")
-        return result['secure_url']
-    except Exception as e:
-        print(f"Error uploading to Cloudinary: {str(e)}")
-        return None
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if header.startswith(b'\xff\xd8\xff'):
+        return 'jpg'
+    if header.startswith((b'GIF87a', b'GIF89a')):
+        return 'gif'
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    return None
 
-def remove_background(image_url):
+def inspect_upload(stream):
     """
-    Remove background from image using fal.ai
+    Read an uploaded stream once, checking its magic bytes and hashing it on the fly.
+    Returns (image_type, sha256 hex digest) and rewinds the stream for the upload.
     """
-    def on_queue_update(update):
-        if isinstance(update, fal_client.InProgress):
-            for log in update.logs:
-                print(log["message"])
+    digest = hashlib.sha256()
+    header = stream.read(UPLOAD_CHUNK_SIZE)
+    image_type = sniff_image_type(header)
+    if image_type is None:
+        return None, None
 
-    try:
-        result = fal_client.subscribe(
-            "fal-ai/bria/background/remove",
-            arguments={
-                "image_url": image_url
-            },
-            with_logs=True,
-            on_queue_update=on_queue_update,
-        )
-        return result
-    except Exception as e:
-        print(f"Error removing background: {str(e)}")
-        return None
+    chunk = header
+    while chunk:
+        digest.update(chunk)
+        chunk = stream.read(UPLOAD_CHUNK_SIZE)
+    stream.seek(0)
+    return image_type, digest.hexdigest()
 
-def generate_video_effects(background_removed_url, effects_prompt):
+def mirror_artifacts(artifact_urls):
     """
-    Generate video with effects using fal-ai pixverse
+    Start mirroring artifacts into the local cache and return their local URLs
     """
-    def on_queue_update(update):
-        if isinstance(update, fal_client.InProgress):
-            for log in update.logs:
-                print(log["message"])
+    cached = {}
+    for name, artifact_url in artifact_urls.items():
+        if isinstance(artifact_url, dict):
+            # e.g. renditions: {'360p': url, 'poster': url}
+            cached[name] = mirror_artifacts(artifact_url)
+            continue
+        key = artifact_cache.mirror_async(artifact_url)
+        cached[name] = url_for('serve_artifact', key=key, _external=True)
+    return cached
 
-    try:
-        result = fal_client.subscribe(
-            "fal-ai/pixverse/v4.5/image-to-video/fast",
-            arguments={
-                "image_url": background_removed_url,
-                "prompt": effects_prompt,
-            },
-            with_logs=True,
-            on_queue_update=on_queue_update,
-        )
-        return result
-    except Exception as e:
-        print(f"Error generating video effects: {str(e)}")
-        return None
+def finish_job(result, deadline, **outcome):
+    """Record an inline job's outcome and keep its trace for /jobs/<job_id>/trace"""
+    record_outcome(result, deadline, **outcome)
+    if result.trace is not None:
+        recent_traces[result.job_id] = result.trace
+        while len(recent_traces) > TRACE_HISTORY:
+            recent_traces.popitem(last=False)
 
-def generate_audio_elevenlabs(message):
-    """
-    Generate audio from text using ElevenLabs API
-    """
-    try:
-        url = f"https://api.elevenlabs.io/v1/text-to-speech/{ELEVENLABS_VOICE_ID}"
-        
-        headers = {
-            "Accept": "audio/mpeg",
-            "Content-Type": "application/json",
-            "xi-api-key": ELEVENLABS_API_KEY
-        }
-        
-        data = {
-            "text": message,
-            "model_id": "eleven_monolingual_v1",
-            "voice_settings": {
-                "stability": 0.5,
-                "similarity_boost": 0.5
-            }
-        }
-        
-        response = requests.post(url, json=data, headers=headers)
-        
-        if response.status_code == 200:
-            # Save audio to temporary file and upload to Cloudinary for URL access
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_file:
-                temp_file.write(response.content)
-                temp_file.flush()
-                
-                # Upload audio to Cloudinary
-                audio_result = cloudinary.uploader.upload(
-                    temp_file.name,
-                    resource_type="video",  # Use video resource type for audio files
-                    folder="generated_audio"
-                )
-                
-                # Clean up temp file
-                os.unlink(temp_file.name)
-                
-                return audio_result['secure_url']
-        else:
-            print(f"ElevenLabs API error: {response.status_code} - {response.text}")
-            return None
-            
-    except Exception as e:
-        print(f"Error generating audio: {str(e)}")
-        return None
+def has_debug_token():
+    """Whether debugging is enabled and the request carries the debug token"""
+    sent = request.headers.get('X-Debug-Token', '')
+    return bool(DEBUG_TOKEN) and hmac.compare_digest(sent, DEBUG_TOKEN)
 
-def sync_lips(video_url, audio_url):
-    """
-    Sync lips using fal.ai lipsync service
-    """
-    def on_queue_update(update):
-        if isinstance(update, fal_client.InProgress):
-            for log in update.logs:
-                print(log["message"])
+def require_debug_token():
+    """404 unless the request may use the debug endpoints"""
+    if not has_debug_token():
+        abort(404)
 
-    try:
-        result = fal_client.subscribe(
-            "veed/lipsync",
-            arguments={
-                "video_url": video_url,
-                "audio_url": audio_url
-            },
-            with_logs=True,
-            on_queue_update=on_queue_update,
-        )
-        return result
-    except Exception as e:
-        print(f"Error syncing lips: {str(e)}")
-        return None
+@app.before_request
+def bind_job_id():
+    """Give every request its own job id for structured logs"""
+    g.job_id = start_job()
 
 @app.route('/process-video', methods=['POST'])
 def process_video():
@@ -194,69 +171,223 @@ def process_video():
         if not allowed_file(file.filename):
             return jsonify({'error': 'Invalid file type. Allowed: png, jpg, jpeg, gif, webp'}), 400
 
-        # Save uploaded file temporarily
-        filename = secure_filename(file.filename)
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(filename)[1]) as temp_file:
-            file.save(temp_file.name)
-            temp_file_path = temp_file.name
+        # Validate by content and hash in a single pass over the upload, then hand
+        # the same stream to Cloudinary instead of copying it to a temp file
+        image_type, content_hash = inspect_upload(file.stream)
+        if not image_type:
+            return jsonify({'error': 'Uploaded file is not a valid png, jpg, gif or webp image'}), 400
 
+        # The client may ask for a shorter budget than the server default
         try:
-            # Step 1: Upload to Cloudinary
-            print("Step 1: Uploading to Cloudinary...")
-            cloudinary_url = upload_to_cloudinary(temp_file_path)
-            if not cloudinary_url:
-                return jsonify({'error': 'Failed to upload image to Cloudinary'}), 500
-
-            # Step 2: Remove background
-            print("Step 2: Removing background...")
-            background_result = remove_background(cloudinary_url)
-            if not background_result or 'image' not in background_result:
-                return jsonify({'error': 'Failed to remove background'}), 500
-            
-            background_removed_url = background_result['image']['url']
+            deadline_seconds = float(request.headers.get('X-Request-Timeout')
+                                     or request.form.get('deadline_seconds')
+                                     or JOB_DEADLINE_SECONDS)
+        except ValueError:
+            deadline_seconds = None
+        if deadline_seconds is None or not (math.isfinite(deadline_seconds) and deadline_seconds > 0):
+            return jsonify({'error': 'deadline_seconds must be a positive number'}), 400
+        deadline = Deadline(min(deadline_seconds, JOB_DEADLINE_SECONDS))
+        renditions = request.form.get('renditions', '1' if RENDITIONS else '0').lower() in ('1', 'true', 'yes')
+        quality_tier = request.form.get('quality_tier', DEFAULT_QUALITY_TIER)
+        if quality_tier not in QUALITY_TIERS:
+            return jsonify({'error': f"quality_tier must be one of: {', '.join(QUALITY_TIERS)}"}), 400
+        token = CancelToken(disconnect_probe=socket_disconnect_probe(request.environ))
+        # Per-request tracing is a debug feature, so it needs the debug token too
+        traced = tracing_enabled() or (request.headers.get('X-Trace') == '1' and has_debug_token())
 
-            # Step 3: Generate video with effects
-            print("Step 3: Generating video with effects...")
-            video_result = generate_video_effects(background_removed_url, effects_prompt)
-            if not video_result or 'video' not in video_result:
-                return jsonify({'error': 'Failed to generate video effects'}), 500
-            
-            video_url = video_result['video']['url']
-
-            # Step 4: Generate audio from message
-            print("Step 4: Generating audio...")
-            audio_url = generate_audio_elevenlabs(message)
-            if not audio_url:
-                return jsonify({'error': 'Failed to generate audio'}), 500
-
-            # Step 5: Sync lips
-            print("Step 5: Syncing lips...")
-            lipsync_result = sync_lips(video_url, audio_url)
-            if not lipsync_result or 'video' not in lipsync_result:
-                return jsonify({'error': 'Failed to sync lips'}), 500
-
-            final_video_url = lipsync_result['video']['url']
-
-            return jsonify({
-                'success': True,
-                'final_video_url': final_video_url,
-                'processing_steps': {
-                    'cloudinary_url': cloudinary_url,
-                    'background_removed_url': background_removed_url,
-                    'effects_video_url': video_url,
-                    'audio_url': audio_url
-                }
-            })
+        result = ProcessingResult(Path(secure_filename(file.filename)).stem, job_id=g.job_id)
+        if job_broker:
+            return enqueue_job(result, file.stream, content_hash, effects_prompt, message, deadline,
+                               renditions, quality_tier, traced)
 
+        active_jobs[g.job_id] = token
+        if traced:
+            start_trace(g.job_id)
+        try:
+            run_pipeline(result, effects_prompt, message, image=file.stream, public_id=content_hash,
+                         token=token, deadline=deadline, renditions=renditions,
+                         quality_tier=quality_tier)
+        except PipelineError as e:
+            finish_job(result, deadline, error=str(e))
+            return jsonify({'error': str(e), 'job_id': g.job_id}), 500
+        except JobCancelled as e:
+            finish_job(result, deadline, cancelled=e)
+            status_code = 504 if e.reason == 'deadline' else 499
+            return jsonify({'error': str(e), 'job_id': g.job_id, 'cancel_reason': e.reason}), status_code
         finally:
-            # Clean up temporary file
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
+            active_jobs.pop(g.job_id, None)
+
+        finish_job(result, deadline)
+        response = {
+            'success': True,
+            'job_id': g.job_id,
+            'final_video_url': result.final_video_url,
+            'processing_steps': processing_steps(result),
+            'audio_seconds_saved': result.audio_seconds_saved,
+            'routing': result.routing
+        }
+        if result.trace is not None:
+            response['trace_url'] = url_for('job_trace', job_id=g.job_id, _external=True)
+
+        if artifact_cache:
+            response['cached_artifacts'] = mirror_artifacts(
+                dict(response['processing_steps'], final_video_url=result.final_video_url)
+            )
+
+        return jsonify(response)
 
     except Exception as e:
-        print(f"Unexpected error in process_video: {str(e)}")
+        stop_trace()
+        log.error("Unexpected error in process_video: %s", e)
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
+def enqueue_job(result, image_stream, content_hash, effects_prompt, message, deadline, renditions, quality_tier,
+                traced=False):
+    """
+    Upload the image while the request still holds it, then queue the rest of
+    the pipeline for a worker. The deadline keeps running while the job waits.
+    """
+    set_stage("upload")
+    log.info("Step 1: Uploading to Cloudinary...")
+    cloudinary_url = upload_to_cloudinary(image_stream, public_id=content_hash)
+    if not cloudinary_url:
+        record_outcome(result, deadline, error='Failed to upload image to Cloudinary')
+        return jsonify({'error': 'Failed to upload image to Cloudinary', 'job_id': result.job_id}), 500
+
+    job_broker.enqueue({
+        'image_name': result.image_name,
+        'cloudinary_url': cloudinary_url,
+        'effects_prompt': effects_prompt,
+        'message': message,
+        'renditions': renditions,
+        'quality_tier': quality_tier,
+        'trace': traced,
+        'deadline_at': time.time() + deadline.remaining()
+    }, job_id=result.job_id)
+    log.info("Queued job for workers")
+    return jsonify({
+        'job_id': result.job_id,
+        'status': 'queued',
+        'status_url': url_for('job_status', job_id=result.job_id, _external=True)
+    }), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """
+    Status and result of a queued job
+    """
+    job = job_broker.get(job_id) if job_broker else None
+    if job is None:
+        return jsonify({'error': 'No job with that id'}), 404
+    status = job.to_dict()
+    if status.get('result') and not has_debug_token():
+        # Traces are only served through /jobs/<job_id>/trace
+        status['result'] = {k: v for k, v in status['result'].items() if k != 'trace'}
+    return jsonify(status)
+
+@app.route('/jobs/<job_id>/trace', methods=['GET'])
+def job_trace(job_id):
+    """
+    Span trace of a traced job: JSON by default, or a text waterfall with ?format=text.
+    Traces name upstream hosts and request ids, so they need the debug token.
+    """
+    require_debug_token()
+    spans = recent_traces.get(job_id)
+    if spans is None and job_broker:
+        job = job_broker.get(job_id)
+        spans = (job.result or {}).get('trace') if job else None
+    if spans is None:
+        return jsonify({'error': 'No trace for that job id'}), 404
+
+    if request.args.get('format') == 'text':
+        return Response(render_waterfall(spans), mimetype='text/plain')
+    return jsonify({'job_id': job_id, 'spans': spans})
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """
+    Cancel a running or queued job; its in-flight fal.ai request is cancelled upstream
+    """
+    token = active_jobs.get(job_id)
+    if token is not None:
+        token.cancel("cancelled")
+    elif not (job_broker and job_broker.request_cancel(job_id)):
+        return jsonify({'error': 'No running job with that id'}), 404
+    return jsonify({'job_id': job_id, 'status': 'cancelling'})
+
+@app.route('/artifacts/<key>', methods=['GET'])
+def serve_artifact(key):
+    """
+    Serve a cached artifact with Range support so players can seek.
+    Full responses go to the WSGI server's file wrapper (sendfile where
+    supported); ranges are copied in Python unless USE_X_SENDFILE is set and
+    nginx/Apache serves the file.
+    """
+    if not artifact_cache:
+        return jsonify({'error': 'Artifact cache is disabled'}), 404
+
+    path = artifact_cache.get_path(secure_filename(key))
+    if path is None:
+        return jsonify({'error': 'Artifact not found'}), 404
+
+    # conditional=True answers Range requests with 206 partial content. With
+    # USE_X_SENDFILE the fronting server answers them from disk instead
+    try:
+        return send_file(path, conditional=True, max_age=86400)
+    except FileNotFoundError:
+        # Evicted between the lookup and the open
+        return jsonify({'error': 'Artifact not found'}), 404
+
+@app.route('/routing', methods=['GET'])
+def routing_stats():
+    """Rolling latency and failure stats the model router is using in this process"""
+    return jsonify(router.snapshot())
+
+@app.route('/debug/tracing', methods=['GET', 'POST'])
+def debug_tracing():
+    """
+    Show or toggle tracing of new jobs. POST enabled=1 (optionally with seconds=N
+    to switch it off again automatically) or enabled=0.
+    """
+    require_debug_token()
+    if request.method == 'POST':
+        enabled = request.values.get('enabled', '1').lower() in ('1', 'true', 'yes')
+        try:
+            seconds = float(request.values['seconds']) if 'seconds' in request.values else None
+        except ValueError:
+            return jsonify({'error': 'seconds must be a number'}), 400
+        set_tracing(enabled, seconds)
+        log.info("Job tracing %s", "enabled" if enabled else "disabled")
+    return jsonify(tracing_status())
+
+@app.route('/debug/profile', methods=['POST'])
+def debug_profile():
+    """
+    Sample every thread in this process for a few seconds and return the
+    collapsed stacks as a file (open in speedscope or flamegraph.pl). The
+    request blocks for the whole window.
+    """
+    require_debug_token()
+    try:
+        seconds = float(request.values.get('seconds', 10))
+        interval = float(request.values.get('interval', 0.01))
+    except ValueError:
+        return jsonify({'error': 'seconds and interval must be numbers'}), 400
+    if not 0 < seconds <= MAX_PROFILE_SECONDS:
+        return jsonify({'error': f'seconds must be between 0 and {MAX_PROFILE_SECONDS}'}), 400
+    mode = request.values.get('mode', 'wall')
+    if mode not in ('wall', 'cpu'):
+        return jsonify({'error': 'mode must be wall or cpu'}), 400
+
+    log.info("Profiling %s time for %.0fs", mode, seconds)
+    try:
+        collapsed = profile(seconds, mode=mode, interval=max(interval, 0.001))
+    except ProfilerBusy as e:
+        return jsonify({'error': str(e)}), 409
+
+    return send_file(io.BytesIO(collapsed.encode()), mimetype='text/plain', as_attachment=True,
+                     download_name=f"profile-{mode}-{time.strftime('%Y%m%d-%H%M%S')}.folded")
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -269,12 +400,23 @@ def home():
         'message': 'Video Processing API',
         'endpoints': {
             'process_video': 'POST /process-video - Upload image, effects prompt, and message',
-            'health': 'GET /health - Health check'
+            'health': 'GET /health - Health check',
+            'routing': 'GET /routing - Model routing stats',
+            'artifacts': 'GET /artifacts/<key> - Cached pipeline artifact (supports Range; set USE_X_SENDFILE behind nginx for zero-copy ranges)',
+            'job_status': 'GET /jobs/<job_id> - Status of a queued job (when JOB_QUEUE_URL is set)',
+            'cancel_job': 'POST /jobs/<job_id>/cancel - Cancel a running or queued job',
+            'job_trace': 'GET /jobs/<job_id>/trace - Span trace of a traced job (?format=text for a waterfall; needs X-Debug-Token)'
         },
         'required_params': {
             'image': 'File upload (png, jpg, jpeg, gif, webp)',
             'effects_prompt': 'String - Video effects description',
             'message': 'String - Text to convert to speech'
+        },
+        'optional_params': {
+            'deadline_seconds': 'Number - End-to-end time budget (or X-Request-Timeout header)',
+            'renditions': 'Boolean - Also build 360p/720p renditions and a poster frame',
+            'quality_tier': 'String - Lowest model quality tier to route to: draft, standard (default) or high',
+            'X-Trace': 'Header - Set to 1 (with X-Debug-Token) to record a span trace for this job'
         }
     })
 
@@ -290,16 +432,21 @@ if __name__ == "__main__":
     
     missing_vars = [var for var in required_env_vars if not os.getenv(var)]
     if missing_vars:
-        print(f"Missing required environment variables: {', '.join(missing_vars)}")
-        print("Please set these in your .env file")
+        log.error("Missing required environment variables: %s", ', '.join(missing_vars))
+        log.error("Please set these in your .env file")
         exit(1)
     
-    print("Starting video processing server...")
-    print("Required environment variables found")
-    print("Server will be available at http://localhost:5000")
-    print("\nEndpoints:")
-    print("  POST /process-video - Main processing endpoint")
-    print("  GET /health - Health check")
-    print("  GET / - API info")
+    log.info("Starting video processing server...")
+    log.info("Required environment variables found")
+    log.info("Server will be available at http://localhost:5000")
+    log.info("Endpoints:")
+    log.info("  POST /process-video - Main processing endpoint")
+    log.info("  GET /health - Health check")
+    log.info("  GET /routing - Model routing stats")
+    log.info("  GET /artifacts/<key> - Cached artifacts (when ARTIFACT_CACHE_DIR is set)")
+    log.info("  GET /jobs/<job_id> - Queued job status (when JOB_QUEUE_URL is set)")
+    log.info("  POST /jobs/<job_id>/cancel - Cancel a running or queued job")
+    log.info("  GET /jobs/<job_id>/trace - Span trace of a traced job")
+    log.info("  GET / - API info")
     
     app.run(debug=True, host='0.0.0.0', port=9887)
\ No newline at end of file
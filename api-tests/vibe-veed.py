@@ -0,0 +1,167 @@
+"""
+Command line entry point for the pipeline stages.
+
+    python vibe-veed.py upload assets/photo.jpg
+    python vibe-veed.py remove-bg https://res.cloudinary.com/.../photo.jpg
+    python vibe-veed.py tts "Hello there" --output hello.mp3
+    python vibe-veed.py lipsync VIDEO_URL hello.mp3
+    python vibe-veed.py run assets/photo.jpg --effects-prompt "slow zoom" --message "Hello there"
+
+Only the standard library is imported up front. Each subcommand imports the
+pipeline modules and upstream clients it needs when it runs, so --help and
+argument errors return in tens of milliseconds (see cli_startup_benchmark.py).
+"""
+import argparse
+import os
+import sys
+
+
+def is_url(value):
+    return value.startswith(('http://', 'https://'))
+
+
+def cmd_upload(args):
+    from cloudinary_upload import upload_image_to_cloudinary, upload_all_images_in_folder
+
+    if os.path.isdir(args.path):
+        results = upload_all_images_in_folder(args.path) or []
+        for result in results:
+            print(result['secure_url'])
+        return 0 if results else 1
+
+    result = upload_image_to_cloudinary(args.path, public_id=args.public_id, folder=args.folder)
+    if not result:
+        return 1
+    print(result['secure_url'])
+    return 0
+
+
+def cmd_remove_bg(args):
+    from video_pipeline import remove_background, upload_to_cloudinary
+
+    image_url = args.image if is_url(args.image) else upload_to_cloudinary(args.image)
+    if not image_url:
+        return 1
+    result = remove_background(image_url, model=args.model)
+    if not result or 'image' not in result:
+        return 1
+    print(result['image']['url'])
+    return 0
+
+
+def cmd_tts(args):
+    from video_pipeline import synthesize_speech
+
+    audio_bytes = synthesize_speech(args.text, model=args.model, voice_id=args.voice_id)
+    if not audio_bytes:
+        return 1
+    with open(args.output, 'wb') as f:
+        f.write(audio_bytes)
+    print(args.output)
+    return 0
+
+
+def cmd_lipsync(args):
+    from video_pipeline import sync_lips, upload_audio
+
+    audio_url = args.audio
+    if not is_url(audio_url):
+        with open(audio_url, 'rb') as f:
+            audio_url = upload_audio(f.read())
+        if not audio_url:
+            return 1
+    result = sync_lips(args.video_url, audio_url, model=args.model)
+    if not result or 'video' not in result:
+        return 1
+    print(result['video']['url'])
+    return 0
+
+
+def cmd_run(args):
+    import json
+    from pathlib import Path
+    from urllib.parse import urlparse
+    from image_processing_generated import ProcessingResult
+    from job_control import Deadline, CancelToken, JobCancelled
+    from pipeline_log import start_job
+    from video_pipeline import PipelineError, run_pipeline, processing_steps, record_outcome
+
+    result = ProcessingResult(Path(urlparse(args.image).path).stem, job_id=start_job())
+    deadline = Deadline(args.deadline)
+    if is_url(args.image):
+        # Already reachable; Cloudinary isn't needed for step 1
+        result.cloudinary_url = args.image
+    try:
+        run_pipeline(result, args.effects_prompt, args.message, image=args.image,
+                     token=CancelToken(), deadline=deadline,
+                     renditions=args.renditions, quality_tier=args.quality_tier)
+    except PipelineError as e:
+        record_outcome(result, deadline, error=str(e))
+        print(json.dumps({'job_id': result.job_id, 'error': str(e)}), file=sys.stderr)
+        return 1
+    except JobCancelled as e:
+        record_outcome(result, deadline, cancelled=e)
+        print(json.dumps({'job_id': result.job_id, 'error': str(e)}), file=sys.stderr)
+        return 1
+
+    record_outcome(result, deadline)
+    print(json.dumps({
+        'job_id': result.job_id,
+        'final_video_url': result.final_video_url,
+        'processing_steps': processing_steps(result),
+        'routing': result.routing
+    }, indent=2))
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='vibe-veed', description='Run vibe-veed pipeline stages')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+
+    upload = subcommands.add_parser('upload', help='Upload an image (or a folder of images) to Cloudinary')
+    upload.add_argument('path', help='Image file or folder')
+    upload.add_argument('--folder', default='uploaded_images', help='Cloudinary folder (default: uploaded_images)')
+    upload.add_argument('--public-id', help='Cloudinary public id for a single image')
+    upload.set_defaults(handler=cmd_upload)
+
+    remove_bg = subcommands.add_parser('remove-bg', help='Remove the background of an image')
+    remove_bg.add_argument('image', help='Image URL, or a local file to upload first')
+    remove_bg.add_argument('--model', default='fal-ai/bria/background/remove', help='fal.ai model')
+    remove_bg.set_defaults(handler=cmd_remove_bg)
+
+    tts = subcommands.add_parser('tts', help='Turn text into speech with ElevenLabs')
+    tts.add_argument('text', help='Text to speak')
+    tts.add_argument('--output', default='speech.mp3', help='Output MP3 file (default: speech.mp3)')
+    tts.add_argument('--voice-id', help='ElevenLabs voice (default: ELEVENLABS_VOICE_ID)')
+    tts.add_argument('--model', default='eleven_monolingual_v1', help='ElevenLabs model')
+    tts.set_defaults(handler=cmd_tts)
+
+    lipsync = subcommands.add_parser('lipsync', help='Lipsync a video to an audio clip')
+    lipsync.add_argument('video_url', help='Video URL')
+    lipsync.add_argument('audio', help='Audio URL, or a local MP3 to upload first')
+    lipsync.add_argument('--model', default='veed/lipsync', help='fal.ai model')
+    lipsync.set_defaults(handler=cmd_lipsync)
+
+    run = subcommands.add_parser('run', help='Run the full pipeline for one image')
+    run.add_argument('image', help='Image file or URL')
+    run.add_argument('--effects-prompt', required=True, help='Video effects description')
+    run.add_argument('--message', required=True, help='Text to speak')
+    run.add_argument('--quality-tier', choices=['draft', 'standard', 'high'],
+                     help='Lowest model quality tier to route to (default: DEFAULT_QUALITY_TIER)')
+    run.add_argument('--renditions', action='store_true', help='Also build 360p/720p renditions and a poster')
+    run.add_argument('--deadline', type=float, default=600, help='End-to-end time budget in seconds (default: 600)')
+    run.set_defaults(handler=cmd_run)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # Settings such as LOG_FORMAT and RENDITIONS are read when the pipeline
+    # modules are imported, so .env has to be loaded before the handler runs
+    from clients import load_env
+    load_env()
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
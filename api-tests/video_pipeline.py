@@ -0,0 +1,320 @@
+"""
+The video pipeline stages, shared by the HTTP server and the queue workers.
+
+    1. upload the source image to Cloudinary
+    2. remove its background (fal.ai bria)
+    3. animate it with an effects prompt (fal.ai pixverse)
+    4. turn the message into speech (ElevenLabs), then trim and compact it
+    5. lipsync the video to the speech (fal.ai veed/lipsync)
+    6. optionally transcode delivery renditions of the final video
+"""
+import io
+from clients import cloudinary_uploader, http, elevenlabs_settings
+from pipeline_log import get_logger, set_stage, fal_log_callback
+from job_control import JobCancelled, subscribe_cancellable
+from image_processing_generated import save_processing_result
+from audio_post import postprocess_audio
+from renditions import RENDITIONS, build_renditions
+from model_router import router
+from tracing import trace_stage, stop_trace
+
+log = get_logger(__name__)
+
+
+class PipelineError(Exception):
+    """A pipeline step failed; the message is safe to return to clients"""
+
+
+def upload_to_cloudinary(file, public_id=None, folder="uploaded_images", resource_type="image"):
+    """
+    Upload a file (path or file-like object) to Cloudinary and return the secure URL
+    """
+    try:
+        upload_options = {'folder': folder, 'resource_type': resource_type}
+        if public_id:
+            # Content-addressed ids make re-uploads of the same image a no-op
+            upload_options['public_id'] = public_id
+            upload_options['overwrite'] = False
+        result = cloudinary_uploader().upload(file, **upload_options)
+        log.info("Upload successful! URL: %s", result['secure_url'])
+        return result['secure_url']
+    except Exception as e:
+        log.error("Error uploading to Cloudinary: %s", e)
+        return None
+
+
+def remove_background(image_url, token=None, deadline=None, model="fal-ai/bria/background/remove"):
+    """
+    Remove background from image using fal.ai
+    """
+    try:
+        result = subscribe_cancellable(
+            model,
+            arguments={
+                "image_url": image_url
+            },
+            on_queue_update=fal_log_callback(log),
+            token=token,
+            deadline=deadline,
+            stage="remove_background",
+        )
+        return result
+    except JobCancelled:
+        raise
+    except Exception as e:
+        log.error("Error removing background: %s", e)
+        return None
+
+
+def generate_video_effects(background_removed_url, effects_prompt, token=None, deadline=None,
+                           model="fal-ai/pixverse/v4.5/image-to-video/fast"):
+    """
+    Generate video with effects using fal-ai pixverse
+    """
+    try:
+        result = subscribe_cancellable(
+            model,
+            arguments={
+                "image_url": background_removed_url,
+                "prompt": effects_prompt,
+            },
+            on_queue_update=fal_log_callback(log),
+            token=token,
+            deadline=deadline,
+            stage="video_effects",
+        )
+        return result
+    except JobCancelled:
+        raise
+    except Exception as e:
+        log.error("Error generating video effects: %s", e)
+        return None
+
+
+def synthesize_speech(message, token=None, deadline=None, model="eleven_monolingual_v1", voice_id=None):
+    """
+    Turn text into MP3 audio using ElevenLabs API; returns the audio bytes.
+    voice_id defaults to ELEVENLABS_VOICE_ID.
+    """
+    requests = http()
+    try:
+        api_key, default_voice_id = elevenlabs_settings()
+        url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id or default_voice_id}"
+        
+        headers = {
+            "Accept": "audio/mpeg",
+            "Content-Type": "application/json",
+            "xi-api-key": api_key
+        }
+        
+        data = {
+            "text": message,
+            "model_id": model,
+            "voice_settings": {
+                "stability": 0.5,
+                "similarity_boost": 0.5
+            }
+        }
+        
+        timeout = deadline.stage_budget("audio") if deadline else None
+        try:
+            response = requests.post(url, json=data, headers=headers, timeout=timeout)
+        except requests.exceptions.Timeout:
+            raise JobCancelled("audio", "deadline")
+        if token:
+            token.check("audio", deadline)
+        
+        if response.status_code == 200:
+            return response.content
+        else:
+            log.error("ElevenLabs API error: %s - %s", response.status_code, response.text)
+            return None
+            
+    except JobCancelled:
+        raise
+    except Exception as e:
+        log.error("Error generating audio: %s", e)
+        return None
+
+
+def upload_audio(audio_bytes):
+    """
+    Upload MP3 audio to Cloudinary straight from memory and return its URL
+    """
+    try:
+        audio_result = cloudinary_uploader().upload(
+            io.BytesIO(audio_bytes),
+            resource_type="video",  # Use video resource type for audio files
+            folder="generated_audio"
+        )
+        return audio_result['secure_url']
+    except Exception as e:
+        log.error("Error uploading audio: %s", e)
+        return None
+
+
+def sync_lips(video_url, audio_url, token=None, deadline=None, model="veed/lipsync"):
+    """
+    Sync lips using fal.ai lipsync service
+    """
+    try:
+        result = subscribe_cancellable(
+            model,
+            arguments={
+                "video_url": video_url,
+                "audio_url": audio_url
+            },
+            on_queue_update=fal_log_callback(log),
+            token=token,
+            deadline=deadline,
+            stage="lipsync",
+        )
+        return result
+    except JobCancelled:
+        raise
+    except Exception as e:
+        log.error("Error syncing lips: %s", e)
+        return None
+
+def run_pipeline(result, effects_prompt, message, image=None, public_id=None, token=None, deadline=None,
+                 renditions=RENDITIONS, quality_tier=None):
+    """
+    Run the pipeline steps for one job, filling in result as each one finishes.
+    Step 1 is skipped when result.cloudinary_url is already set (e.g. the server
+    uploaded the image before queueing the job). Model stages are routed to the
+    fastest healthy model within quality_tier. Raises PipelineError when a
+    step fails and JobCancelled when the job is cancelled or out of time.
+    """
+    routing = result.routing = {}
+
+    def check(stage):
+        set_stage(stage)
+        result.start_stage(stage)
+        trace_stage(stage)
+        if token:
+            token.check(stage, deadline)
+
+    # Step 1: Upload to Cloudinary
+    if not result.cloudinary_url:
+        check("upload")
+        log.info("Step 1: Uploading to Cloudinary...")
+        cloudinary_url = upload_to_cloudinary(image, public_id=public_id)
+        if not cloudinary_url:
+            raise PipelineError('Failed to upload image to Cloudinary')
+        result.cloudinary_url = cloudinary_url
+
+    # Step 2: Remove background
+    check("remove_background")
+    log.info("Step 2: Removing background...")
+    background_result = router.call("remove_background", quality_tier, lambda model: _output_with(
+        remove_background(result.cloudinary_url, token=token, deadline=deadline, model=model), 'image'
+    ), routing=routing, deadline=deadline)
+    if not background_result or 'image' not in background_result:
+        raise PipelineError('Failed to remove background')
+    result.background_removed_url = background_result['image']['url']
+
+    # Step 3: Generate video with effects
+    check("video_effects")
+    log.info("Step 3: Generating video with effects...")
+    video_result = router.call("video_effects", quality_tier, lambda model: _output_with(
+        generate_video_effects(result.background_removed_url, effects_prompt,
+                               token=token, deadline=deadline, model=model), 'video'
+    ), routing=routing, deadline=deadline)
+    if not video_result or 'video' not in video_result:
+        raise PipelineError('Failed to generate video effects')
+    result.effects_video_url = video_result['video']['url']
+
+    # Step 4: Generate audio from message
+    check("audio")
+    log.info("Step 4: Generating audio...")
+    audio_bytes = router.call("audio", quality_tier, lambda model: synthesize_speech(
+        message, token=token, deadline=deadline, model=model
+    ), routing=routing, deadline=deadline)
+    if not audio_bytes:
+        raise PipelineError('Failed to generate audio')
+
+    # Trim and compact the speech so the upload and the lipsync render are shorter
+    check("audio_post")
+    audio_bytes, audio_stats = postprocess_audio(
+        audio_bytes, timeout=deadline.stage_budget("audio_post") if deadline else None
+    )
+    if audio_stats:
+        result.audio_seconds_saved = audio_stats['seconds_saved']
+
+    audio_url = upload_audio(audio_bytes)
+    if not audio_url:
+        raise PipelineError('Failed to upload audio')
+    result.audio_url = audio_url
+
+    # Step 5: Sync lips
+    check("lipsync")
+    log.info("Step 5: Syncing lips...")
+    lipsync_result = router.call("lipsync", quality_tier, lambda model: _output_with(
+        sync_lips(result.effects_video_url, audio_url, token=token, deadline=deadline, model=model), 'video'
+    ), routing=routing, deadline=deadline)
+    if not lipsync_result or 'video' not in lipsync_result:
+        raise PipelineError('Failed to sync lips')
+    result.final_video_url = lipsync_result['video']['url']
+
+    # Step 6: Smaller renditions for delivery. The final video already exists,
+    # so running out of time here skips renditions instead of cancelling the job
+    if renditions:
+        set_stage("renditions")
+        result.start_stage("renditions")
+        trace_stage("renditions")
+        if deadline and deadline.remaining() <= 0:
+            log.warning("No time left for renditions; skipping them")
+        else:
+            log.info("Step 6: Building renditions...")
+            result.renditions = build_renditions(
+                result.final_video_url, upload_rendition,
+                timeout=deadline.remaining() if deadline else None
+            )
+
+    result.status = "completed"
+    return result
+
+
+def _output_with(output, key):
+    """Treat a model response without the expected output as a failed call"""
+    return output if output and key in output else None
+
+
+def upload_rendition(path, resource_type):
+    """Store a rendition or poster through the regular Cloudinary upload path"""
+    return upload_to_cloudinary(path, folder="renditions", resource_type=resource_type)
+
+
+def processing_steps(result):
+    """The intermediate artifact URLs reported alongside the final video"""
+    steps = {
+        'cloudinary_url': result.cloudinary_url,
+        'background_removed_url': result.background_removed_url,
+        'effects_video_url': result.effects_video_url,
+        'audio_url': result.audio_url
+    }
+    if result.renditions:
+        steps['renditions'] = result.renditions
+    return steps
+
+
+def record_outcome(result, deadline, error=None, cancelled=None):
+    """
+    Stamp the final status, cancellation details, run time and trace (if the
+    job was traced) on result and save it
+    """
+    if cancelled is not None:
+        result.status = "cancelled"
+        result.cancelled_stage = cancelled.stage
+        result.cancel_reason = cancelled.reason
+        log.warning("Job cancelled during %s after %.1fs: %s",
+                    cancelled.stage, deadline.elapsed(), cancelled.reason)
+    elif error is not None:
+        result.status = "failed"
+        result.error = error
+    result.start_stage(None)
+    result.elapsed_seconds = round(deadline.elapsed(), 3)
+    trace = stop_trace()
+    if trace is not None:
+        result.trace = trace.to_list()
+    return save_processing_result(result)
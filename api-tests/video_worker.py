@@ -0,0 +1,155 @@
+"""
+Queue worker that runs the video pipeline for jobs queued by vibe-veed-server.py.
+
+Start as many of these as you like on the host that holds the SQLite queue:
+
+    JOB_QUEUE_URL=sqlite:///jobs.db python video_worker.py --concurrency 2
+
+Workers on other hosts need a networked broker, loaded through JOB_QUEUE_BROKER
+(see job_queue.py):
+
+    JOB_QUEUE_BROKER=redis_broker JOB_QUEUE_URL=redis://queue-host:6379/0 python video_worker.py
+
+Each job is leased for --lease-seconds and the lease is renewed by a heartbeat
+while the pipeline runs. If a worker dies its jobs are picked up again by
+another worker once their lease expires. A heartbeat that fails (lease lost,
+or the job was cancelled through the API) cancels the job's in-flight fal.ai
+request.
+"""
+import argparse
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+# Load environment variables before the pipeline modules read their settings
+load_dotenv()
+
+from image_processing_generated import ProcessingResult
+from job_control import CancelToken, Deadline, JobCancelled
+from job_queue import get_broker, CANCELLED
+from pipeline_log import get_logger, job_context
+from tracing import start_trace, stop_trace
+from video_pipeline import PipelineError, run_pipeline, processing_steps, record_outcome
+
+log = get_logger(__name__)
+
+
+def job_result(result, **extra):
+    """
+    The result stored with a queued job. A trace goes under its own "trace" key,
+    which /jobs/<job_id> strips unless the caller has the debug token.
+    """
+    stored = dict(result.to_dict(), **extra)
+    if result.trace is not None:
+        stored['trace'] = result.trace
+    return stored
+
+
+class Worker:
+    def __init__(self, broker, worker_id=None, concurrency=1, lease_seconds=60, poll_interval=2.0):
+        self.broker = broker
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._stopping = threading.Event()
+
+    def stop(self, *_):
+        """Stop taking new jobs; jobs already running are finished"""
+        log.info("Worker %s stopping after current jobs", self.worker_id)
+        self._stopping.set()
+
+    def run(self):
+        log.info("Worker %s started with %s slot(s)", self.worker_id, self.concurrency)
+        slots = threading.Semaphore(self.concurrency)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while not self._stopping.is_set():
+                slots.acquire()
+                # stop() may have been called while every slot was busy
+                if self._stopping.is_set():
+                    slots.release()
+                    break
+                job = self.broker.lease(self.worker_id, self.lease_seconds)
+                if job is None:
+                    slots.release()
+                    self._stopping.wait(self.poll_interval)
+                    continue
+                future = executor.submit(self.process, job)
+                future.add_done_callback(lambda _: slots.release())
+
+    def process(self, job):
+        """Run one leased job to completion, keeping its lease alive meanwhile"""
+        payload = job.payload
+        with job_context(job.job_id):
+            log.info("Leased job (attempt %s)", job.attempts)
+            deadline = Deadline(payload['deadline_at'] - time.time())
+            token = CancelToken()
+            heartbeat = threading.Thread(target=self._heartbeat, args=(job, token), daemon=True)
+            heartbeat.start()
+
+            result = ProcessingResult(payload['image_name'], job_id=job.job_id)
+            result.cloudinary_url = payload['cloudinary_url']
+            if payload.get('trace'):
+                start_trace(job.job_id)
+            try:
+                token.check("queued", deadline)
+                run_pipeline(result, payload['effects_prompt'], payload['message'],
+                             token=token, deadline=deadline,
+                             renditions=payload.get('renditions', False),
+                             quality_tier=payload.get('quality_tier'))
+            except PipelineError as e:
+                record_outcome(result, deadline, error=str(e))
+                self.broker.fail(job.job_id, self.worker_id, str(e), result=job_result(result))
+                return
+            except JobCancelled as e:
+                record_outcome(result, deadline, cancelled=e)
+                self.broker.fail(job.job_id, self.worker_id, str(e), status=CANCELLED,
+                                 result=job_result(result))
+                return
+            except Exception as e:
+                # Unexpected errors leave the lease to expire so the job is retried
+                log.error("Unexpected error processing job: %s", e)
+                stop_trace()
+                return
+            finally:
+                token.cancel("finished")
+
+            record_outcome(result, deadline)
+            self.broker.complete(job.job_id, self.worker_id,
+                                 job_result(result, processing_steps=processing_steps(result)))
+            log.info("Job completed")
+
+    def _heartbeat(self, job, token):
+        """Renew the lease until the job ends; cancel it if the lease can't be renewed"""
+        interval = self.lease_seconds / 3
+        while not token.is_cancelled():
+            time.sleep(interval)
+            if token.is_cancelled():
+                return
+            if not self.broker.heartbeat(job.job_id, self.worker_id, self.lease_seconds):
+                log.warning("Lost lease on job %s or it was cancelled; stopping it", job.job_id)
+                token.cancel("cancelled")
+                return
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run video pipeline jobs from the job queue')
+    parser.add_argument('--queue-url', default=os.getenv('JOB_QUEUE_URL', 'sqlite:///jobs.db'),
+                        help='Job queue URL (default: $JOB_QUEUE_URL or sqlite:///jobs.db)')
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help='Jobs this worker runs at once (default: 1)')
+    parser.add_argument('--lease-seconds', type=int, default=60,
+                        help='How long a job stays leased without a heartbeat (default: 60)')
+    parser.add_argument('--worker-id', help='Worker name (default: hostname-pid)')
+    args = parser.parse_args()
+
+    worker = Worker(get_broker(args.queue_url), worker_id=args.worker_id,
+                    concurrency=args.concurrency, lease_seconds=args.lease_seconds)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()